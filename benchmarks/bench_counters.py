@@ -0,0 +1,165 @@
+"""Contention benchmark for like/dislike counters and poll votes.
+
+Usage:
+    python -m benchmarks.bench_counters --clicks 20000 --concurrency 200 --hot 5
+    python -m benchmarks.bench_counters --mongo-url mongodb://localhost:27017
+
+Many concurrent users, one click each, hit a handful of hot posts, once with
+every click written as its own `$inc` and once through the write-coalescing
+buffer. Reports click throughput, latency and how many `$inc` operations
+reached the database.
+Votes from distinct voters on one poll then go through `cast_vote` the same
+two ways, and the stored tallies are checked against the votes cast.
+Uses an in-process Mongo stand-in unless `--mongo-url` is given; only a real
+server shows the cost of document-level write contention.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from pathlib import Path
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from mongomock_motor import AsyncMongoMockClient
+
+from benchmarks.reporting import summarize, write_results
+from src import models
+from src.helpers import polls, reactions
+from src.utils.counters import CounterBuffer
+
+
+class CountingBuffer(CounterBuffer):
+    """Counts the `$inc` operations each flush sends to the database"""
+
+    operations = 0
+
+    async def _write(self, pending):
+        self.operations += len(pending)
+        return await super()._write(pending)
+
+
+async def run_clicks(run: str, post_ids: list, clicks: int, concurrency: int) -> dict:
+    rng = random.Random(2623)
+    targets = [rng.choice(post_ids) for _ in range(clicks)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def click(i, post_id):
+        async with semaphore:
+            began = time.perf_counter()
+            await reactions.react("posts", post_id, "likes", f"{run}{i}@example.com")
+            latencies.append(time.perf_counter() - began)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(click(i, post_id) for i, post_id in enumerate(targets)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def run_votes(votes: int, concurrency: int) -> dict:
+    options = [models.PollOptions(option=f"Option {i}") for i in range(4)]
+    poll = await models.Poll(
+        title="Hot poll", author="bench", question="?", options=options, duration=3600
+    ).insert()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def vote(i):
+        async with semaphore:
+            began = time.perf_counter()
+            await polls.cast_vote(poll.id, f"Option {i % 4}", f"voter{i}@example.com")
+            latencies.append(time.perf_counter() - began)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(vote(i) for i in range(votes)))
+    result = summarize(latencies, time.perf_counter() - start)
+
+    await polls.vote_counters.flush()
+    stored = await models.Poll.get(poll.id)
+    counted = sum(option.votes for option in stored.options)
+    if counted != votes:
+        raise RuntimeError(f"Expected {votes} votes, found {counted}")
+    return result
+
+
+async def main(args):
+    if args.mongo_url:
+        client = AsyncIOMotorClient(args.mongo_url)
+    else:
+        client = AsyncMongoMockClient()
+    await client.drop_database("mict-benchmark-counters")
+    await init_beanie(
+        client["mict-benchmark-counters"],
+        document_models=[
+            models.Post,
+            models.Announcements,
+            models.Reaction,
+            models.Poll,
+            models.PollVote,
+        ],
+    )
+    posts = [
+        await models.Post(title=f"Hot post {i}", author="bench", content="").insert()
+        for i in range(args.hot)
+    ]
+    post_ids = [post.id for post in posts]
+
+    scenarios = {}
+
+    reactions.reaction_counters = CounterBuffer(0)
+    scenarios["direct"] = await run_clicks(
+        "direct", post_ids, args.clicks, args.concurrency
+    )
+    scenarios["direct"]["database_operations"] = args.clicks
+
+    buffer = reactions.reaction_counters = CountingBuffer(args.flush_interval)
+    buffer.start()
+    scenarios["coalesced"] = await run_clicks(
+        "coalesced", post_ids, args.clicks, args.concurrency
+    )
+    await buffer.stop()
+    scenarios["coalesced"]["database_operations"] = buffer.operations
+
+    stored = sum(post.likes for post in await models.Post.find_all().to_list())
+    if stored != 2 * args.clicks:
+        raise RuntimeError(f"Expected {2 * args.clicks} likes, found {stored}")
+
+    polls.vote_counters = CounterBuffer(0)
+    scenarios["direct_votes"] = await run_votes(args.votes, args.concurrency)
+    scenarios["direct_votes"]["database_operations"] = args.votes
+
+    buffer = polls.vote_counters = CountingBuffer(args.flush_interval)
+    buffer.start()
+    scenarios["coalesced_votes"] = await run_votes(args.votes, args.concurrency)
+    await buffer.stop()
+    scenarios["coalesced_votes"]["database_operations"] = buffer.operations
+
+    for name, result in scenarios.items():
+        print(
+            f"{name:<16} {result['throughput_ops_s']:>10} ops/s  "
+            f"p50 {result['latency_ms']['p50']:>8} ms  "
+            f"p99 {result['latency_ms']['p99']:>8} ms  "
+            f"{result['database_operations']} $inc operations"
+        )
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    path = write_results("counters", scenarios, config, args.output)
+    print(f"Results written to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--hot", type=int, default=5)
+    parser.add_argument("--votes", type=int, default=2000)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--mongo-url", default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
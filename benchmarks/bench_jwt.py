@@ -0,0 +1,112 @@
+"""Micro-benchmark of access-token verifications per second on one core.
+
+Usage:
+    python -m benchmarks.bench_jwt --tokens 1000 --rounds 20000
+
+Compares HS256, RS256 and EdDSA with the verified-token cache disabled (every
+call checks the signature) and enabled (a pool of tokens reused by clients).
+"""
+
+import argparse
+import time
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from benchmarks.reporting import write_results
+from src.utils.tokens import TokenVerifier
+
+
+def key_pair(algorithm: str) -> tuple[str, str]:
+    """Returns (signing key, verification key) as the env/PEM files would"""
+    if algorithm.startswith("HS"):
+        return "benchmark-secret-key-" * 2, "benchmark-secret-key-" * 2
+
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = (
+        private_key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+    return private_pem, public_pem
+
+
+def verifications_per_second(verifier: TokenVerifier, tokens: list[str], rounds: int):
+    verify = verifier.verify
+    count = len(tokens)
+    # * Warm up, so the cached run measures steady state rather than first sight
+    for token in tokens:
+        verify(token)
+
+    start = time.process_time()
+    for i in range(rounds):
+        verify(tokens[i % count])
+    elapsed = time.process_time() - start
+    return round(rounds / elapsed, 1) if elapsed else 0.0
+
+
+def main(args):
+    scenarios = {}
+    expire = datetime.now(timezone.utc) + timedelta(hours=1)
+
+    for algorithm in args.algorithms:
+        signing_key, verification_key = key_pair(algorithm)
+        issuer = TokenVerifier(algorithm, signing_key, verification_key, cache_size=0)
+        tokens = [
+            issuer.encode(
+                {"sub": f"user{i}@example.com", "scopes": ["me"], "exp": expire}
+            )
+            for i in range(args.tokens)
+        ]
+
+        uncached = TokenVerifier(algorithm, None, verification_key, cache_size=0)
+        cached = TokenVerifier(
+            algorithm, None, verification_key, cache_size=args.tokens
+        )
+        scenarios[algorithm] = {
+            "uncached_verifications_s": verifications_per_second(
+                uncached, tokens, args.rounds
+            ),
+            "cached_verifications_s": verifications_per_second(
+                cached, tokens, args.rounds
+            ),
+        }
+        result = scenarios[algorithm]
+        print(
+            f"{algorithm:<6} uncached {result['uncached_verifications_s']:>12}/s  "
+            f"cached {result['cached_verifications_s']:>12}/s"
+        )
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    path = write_results("jwt", scenarios, config, args.output)
+    print(f"Results written to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--algorithms", nargs="+", default=["HS256", "RS256", "EdDSA"]
+    )
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--output", type=Path, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
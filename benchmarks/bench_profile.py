@@ -0,0 +1,145 @@
+"""Profile-read latency against the number of posts a user has.
+
+Usage:
+    python -m benchmarks.bench_profile --lengths 0 10 100 1000 5000
+    python -m benchmarks.bench_profile --mongo-url mongodb://localhost:27017
+
+Compares the old layout, with every post (and its comments) embedded in the
+user document, to the current one: the user document plus the first keyset
+page of posts from the indexed `posts` collection. Uses an in-process Mongo
+stand-in unless `--mongo-url` is given; the stand-in scans instead of using
+indexes, so only a real server shows the split read staying flat.
+"""
+
+import argparse
+import asyncio
+import time
+
+from pathlib import Path
+
+import bson
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from mongomock_motor import AsyncMongoMockClient
+
+from benchmarks.reporting import summarize, write_results
+from src import models
+from src.helpers.pagination import keyset_page
+
+
+class LegacyProfile(models.UserBase):
+    """The verified user as it was stored before posts moved out of it"""
+
+    is_active: bool = True
+    verified: bool = True
+    permissions: list[str] = []
+    polls: list = []
+    posts: list = []
+    announcements: list = []
+
+
+def user_fields(n: int) -> dict:
+    return {
+        "email": f"profile{n}@example.com",
+        "first_name": "Bench",
+        "last_name": "Tester",
+        "phone_number": f"26481{n:07d}",
+        "password": "$2b$12$" + "x" * 53,
+        "national_id_number": "90010100000",
+        "dob": {"day": "01", "month": "01", "year": "1990"},
+        "permissions": ["me", "verified"],
+        "verified": True,
+    }
+
+
+def post_fields(author: str, i: int, comments: int) -> dict:
+    return {
+        "title": f"Post {i}",
+        "author": author,
+        "content": "Update on the rule of law consultations. " * 12,
+        "image": {"content_type": "image/jpeg", "filename": f"post-{i}.jpg"},
+        "comments": [f"Comment {c} on post {i}" for c in range(comments)],
+        "likes": i,
+        "dislikes": 0,
+    }
+
+
+async def read_latencies(read, rounds: int) -> tuple[list[float], float]:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        began = time.perf_counter()
+        await read()
+        latencies.append(time.perf_counter() - began)
+    return latencies, time.perf_counter() - start
+
+
+async def main(args):
+    if args.mongo_url:
+        client = AsyncIOMotorClient(args.mongo_url)
+    else:
+        client = AsyncMongoMockClient()
+    database = client["mict-benchmark-profile"]
+    await client.drop_database("mict-benchmark-profile")
+    await init_beanie(
+        database,
+        document_models=[models.User, models.VerifiedUser, models.Post],
+    )
+    legacy_users = database["legacy_users"]
+
+    scenarios = {}
+    for length in args.lengths:
+        fields = user_fields(length)
+        email = fields["email"]
+        posts = [post_fields(email, i, args.comments) for i in range(length)]
+
+        legacy_document = {**fields, "polls": [], "posts": posts, "announcements": []}
+        await legacy_users.insert_one(legacy_document)
+        await models.VerifiedUser(**fields).insert()
+        for post in posts:
+            post = {key: value for key, value in post.items() if key != "comments"}
+            await models.Post(**post, comment_count=args.comments).insert()
+
+        async def legacy_read():
+            document = await legacy_users.find_one({"email": email})
+            return LegacyProfile.model_validate(document).model_dump()
+
+        async def split_read():
+            user = await models.User.find_one(
+                models.User.email == email, with_children=True
+            )
+            page = await keyset_page(models.Post, models.Post.author == email)
+            return user.model_dump(), [post.model_dump() for post in page["items"]]
+
+        legacy, legacy_elapsed = await read_latencies(legacy_read, args.rounds)
+        split, split_elapsed = await read_latencies(split_read, args.rounds)
+        result = scenarios[f"posts_{length}"] = {
+            "legacy_document_bytes": len(bson.encode(legacy_document)),
+            "legacy": summarize(legacy, legacy_elapsed),
+            "split": summarize(split, split_elapsed),
+        }
+        print(
+            f"{length:>6} posts  "
+            f"legacy p50 {result['legacy']['latency_ms']['p50']:>9} ms  "
+            f"split p50 {result['split']['latency_ms']['p50']:>9} ms  "
+            f"({result['legacy_document_bytes']} byte legacy document)"
+        )
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    path = write_results("profile", scenarios, config, args.output)
+    print(f"Results written to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[0, 10, 100, 1000])
+    parser.add_argument("--comments", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--mongo-url", default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,143 @@
+"""Micro-benchmark of JSON response rendering and compression on one core.
+
+Usage:
+    python -m benchmarks.bench_serialization --posts 10 100 1000 --rounds 200
+
+Renders a verified user's profile together with a page of their posts, once
+through the stdlib path (`model_dump` then `JSONResponse`) and once through
+`ModelJSONResponse`, then compresses the body with each gzip level and brotli
+quality given. Reports CPU time per response, bytes/sec and compression ratio.
+"""
+
+import argparse
+import asyncio
+import time
+
+from pathlib import Path
+
+from beanie import init_beanie
+from fastapi.responses import JSONResponse
+from mongomock_motor import AsyncMongoMockClient
+
+from benchmarks.reporting import write_results
+from src import models
+from src.utils.compression import compress
+from src.utils.responses import ModelJSONResponse
+
+
+def build_payload(posts: int) -> dict:
+    user = models.VerifiedUser(
+        email="bench@example.com",
+        first_name="Bench",
+        last_name="Marker",
+        phone_number="264811234567",
+        employer="Ministry of Information and Communication Technology",
+        position="Spokesperson",
+        password="benchmark-password",
+        national_id_number="11010100000",
+        dob={"day": "01", "month": "01", "year": "1990"},
+        verified=True,
+        permissions=["me", "posts", "polls", "announcements"],
+    )
+    page = [
+        models.Post(
+            title=f"Post number {i}",
+            author=user.email,
+            content="Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8,
+            image=models.PostImage(
+                key=f"posts/{i}/original",
+                content_type="image/jpeg",
+                size=204800 + i,
+                etag=f"{i:064x}",
+            ),
+            comment_count=i % 50,
+            likes=i * 3,
+            dislikes=i % 7,
+        )
+        for i in range(posts)
+    ]
+    return {"user": user, "items": page, "next_cursor": None}
+
+
+def stdlib_render(payload: dict) -> bytes:
+    content = {
+        "user": payload["user"].model_dump(mode="json", by_alias=True),
+        "items": [
+            post.model_dump(mode="json", by_alias=True) for post in payload["items"]
+        ],
+        "next_cursor": payload["next_cursor"],
+    }
+    return JSONResponse(content).body
+
+
+def model_render(payload: dict) -> bytes:
+    return ModelJSONResponse(payload).body
+
+
+def measure(render, rounds: int, processed: int | None = None) -> dict:
+    """Times `render`, throughput counts `processed` bytes or the output size"""
+    body = render()  # * Warm up
+    start = time.process_time()
+    for _ in range(rounds):
+        render()
+    elapsed = time.process_time() - start
+    processed = len(body) if processed is None else processed
+    return {
+        "bytes": len(body),
+        "cpu_us_per_response": round(elapsed / rounds * 1e6, 2),
+        "megabytes_s": round(processed * rounds / elapsed / 1e6, 2) if elapsed else 0,
+    }
+
+
+async def main(args):
+    # * Beanie documents need an initialised model, no queries are made
+    await init_beanie(
+        AsyncMongoMockClient()["mict-benchmark-serialization"],
+        document_models=[models.User, models.VerifiedUser, models.Post],
+    )
+
+    scenarios = {}
+    for posts in args.posts:
+        payload = build_payload(posts)
+        result = {
+            "stdlib": measure(lambda: stdlib_render(payload), args.rounds),
+            "model": measure(lambda: model_render(payload), args.rounds),
+        }
+
+        body = model_render(payload)
+        compressions = [("gzip", level) for level in args.gzip_levels] + [
+            ("br", quality) for quality in args.brotli_qualities
+        ]
+        for encoding, level in compressions:
+            stats = measure(
+                lambda: compress(body, encoding, level), args.rounds, len(body)
+            )
+            stats["ratio"] = round(len(body) / stats["bytes"], 2)
+            result[f"{encoding}-{level}"] = stats
+
+        scenarios[f"{posts}_posts"] = result
+        print(f"{posts} posts, {len(body)} bytes")
+        for name, stats in result.items():
+            ratio = f"  ratio {stats['ratio']}" if "ratio" in stats else ""
+            print(
+                f"  {name:<8} {stats['cpu_us_per_response']:>10} us/response  "
+                f"{stats['megabytes_s']:>8} MB/s{ratio}"
+            )
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    path = write_results("serialization", scenarios, config, args.output)
+    print(f"Results written to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--gzip-levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--brotli-qualities", type=int, nargs="+", default=[1, 4, 9])
+    parser.add_argument("--output", type=Path, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
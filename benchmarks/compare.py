@@ -0,0 +1,71 @@
+"""Compares two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+
+Prints throughput and p50/p99 latency for every scenario present in both runs,
+and exits non-zero when p99 latency regresses by more than `--threshold` percent.
+"""
+
+import argparse
+import json
+import sys
+
+from pathlib import Path
+
+
+def flatten(scenarios: dict, prefix: str = "") -> dict:
+    """Flattens nested scenarios such as `mixed.login` into one mapping"""
+    flat = {}
+    for name, summary in scenarios.items():
+        if not isinstance(summary, dict):
+            continue
+        if "latency_ms" in summary:
+            flat[prefix + name] = summary
+        else:
+            flat.update(flatten(summary, f"{prefix}{name}."))
+    return flat
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main(args) -> int:
+    old = json.loads(args.old.read_text())
+    new = json.loads(args.new.read_text())
+    old_scenarios = flatten(old["scenarios"])
+    new_scenarios = flatten(new["scenarios"])
+
+    print(f"{old['benchmark']}: {old['commit']} -> {new['commit']}")
+    regressions = []
+    for name in old_scenarios.keys() & new_scenarios.keys():
+        before, after = old_scenarios[name], new_scenarios[name]
+        p99_change = change(before["latency_ms"]["p99"], after["latency_ms"]["p99"])
+        print(
+            f"{name:<20} "
+            f"ops/s {before['throughput_ops_s']:>9} -> {after['throughput_ops_s']:<9} "
+            f"({change(before['throughput_ops_s'], after['throughput_ops_s']):+.1f}%)  "
+            f"p50 {before['latency_ms']['p50']:>8} -> {after['latency_ms']['p50']:<8} ms  "
+            f"p99 {before['latency_ms']['p99']:>8} -> {after['latency_ms']['p99']:<8} ms "
+            f"({p99_change:+.1f}%)"
+        )
+        if p99_change > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"p99 regressions over {args.threshold}%: {', '.join(sorted(regressions))}")
+        return 1
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
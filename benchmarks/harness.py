@@ -0,0 +1,220 @@
+"""Shared plumbing for the offline benchmarks.
+
+Boots the FastAPI `app` from `main.py` against an in-process Mongo stand-in
+(mongomock-motor) and deterministic fake embedding/LLM backends, so runs are
+reproducible without MongoDB or Ollama.
+
+When `main.py` cannot be imported (it needs the LangChain stack and every
+router it lists), an app is built from the routers under `src/routers` that
+do import, with the same middleware. The bot WebSocket lives in `main.py`, so
+`app.state.has_bot` is False and the bot scenarios are skipped.
+"""
+
+import asyncio
+import importlib
+import os
+import pkgutil
+
+from contextlib import asynccontextmanager
+
+import httpx
+
+from beanie import init_beanie
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from mongomock_motor import AsyncMongoMockClient
+
+# * The app reads these on every login, give them stable values for benchmarking
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+# * Every simulated client shares one IP, lift the limits unless a run sets them
+for budget in ("LOGIN", "CREATE_USER", "BOT_CHAT"):
+    os.environ.setdefault(f"RATE_LIMIT_{budget}", "1000000/1")
+    os.environ.setdefault(f"RATE_LIMIT_{budget}_GLOBAL", "1000000/1")
+
+from src import models, routers  # noqa: E402
+from src.helpers.background_tasks import background_workers  # noqa: E402
+from src.utils.compression import CompressionMiddleware  # noqa: E402
+from src.utils.responses import ModelJSONResponse  # noqa: E402
+
+FAKE_ANSWERS = [
+    "The Namibian constitution guarantees equality before the law.",
+    "Laws must be enacted through a fair and transparent process.",
+    "I don't know.",
+]
+
+
+def fake_documents() -> list:
+    from langchain_core.documents import Document
+
+    return [
+        Document(
+            page_content=(
+                f"Article {i}. The rule of law requires that processes for "
+                f"enacting and applying laws are fair, transparent and accessible."
+            ),
+            metadata={"page": i},
+        )
+        for i in range(50)
+    ]
+
+
+def main_app() -> FastAPI:
+    """The app from `main.py`, with its lifespan swapped for in-process backends"""
+    import main
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    @asynccontextmanager
+    async def fake_lifespan(app):
+        main.chat_bot["rag_chain"] = main.init_bot(
+            documents=fake_documents(),
+            embeddings=DeterministicFakeEmbedding(size=256),
+            model=FakeListChatModel(responses=FAKE_ANSWERS),
+        )
+        await main.initialize_database(AsyncMongoMockClient())
+        async with background_workers():
+            yield
+
+    app = main.app
+    app.router.lifespan_context = fake_lifespan
+    app.state.has_bot = True
+    return app
+
+
+def routers_app() -> FastAPI:
+    """An app from every router that imports, configured like `main.app`"""
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await init_beanie(
+            AsyncMongoMockClient()["mict-hackathon"],
+            document_models=models.DOCUMENT_MODELS,
+        )
+        async with background_workers():
+            yield
+
+    app = FastAPI(lifespan=lifespan, default_response_class=ModelJSONResponse)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(CompressionMiddleware)
+    for module in pkgutil.iter_modules(routers.__path__):
+        try:
+            router = importlib.import_module(f"src.routers.{module.name}").router
+        except ImportError as e:
+            print(f"Skipping router {module.name}: {e}")
+            continue
+        app.include_router(router)
+    app.state.has_bot = False
+    return app
+
+
+def build_app() -> FastAPI:
+    try:
+        return main_app()
+    except ImportError as e:
+        print(f"main.py cannot be imported ({e}), benchmarking the routers only")
+        return routers_app()
+
+
+@asynccontextmanager
+async def running_app():
+    """Runs the app's startup/shutdown and yields an HTTP client bound to it"""
+    app = build_app()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            yield app, client
+
+
+class WebSocketSession:
+    """Minimal in-process ASGI WebSocket client.
+
+    httpx has no WebSocket support and Starlette's TestClient runs the app in a
+    separate thread, which would hide event-loop lag. This drives the ASGI
+    callable directly on the current loop instead.
+    """
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self):
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"benchmark")],
+            "client": ("127.0.0.1", 0),
+            "server": ("benchmark", 80),
+            "subprotocols": [],
+        }
+        self._task = asyncio.create_task(
+            self.app(scope, self._to_app.get, self._from_app.put)
+        )
+        await self._to_app.put({"type": "websocket.connect"})
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            raise RuntimeError(f"WebSocket rejected: {message}")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    async def send_text(self, text: str):
+        await self._to_app.put({"type": "websocket.receive", "text": text})
+
+    async def receive_text(self) -> str:
+        message = await self._from_app.get()
+        if message["type"] == "websocket.close":
+            raise RuntimeError(f"WebSocket closed: {message}")
+        return message.get("text") or message.get("bytes", b"").decode()
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a fixed-interval sleep"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,93 @@
+"""Statistics and result files shared by every benchmark"""
+
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile, returns 0.0 for an empty list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(
+    latencies: list[float],
+    elapsed: float,
+    errors: int = 0,
+    loop_lag: list[float] | None = None,
+) -> dict:
+    """Reduces raw latencies (seconds) to the stats stored in result files"""
+    summary = {
+        "operations": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_ops_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(max(latencies, default=0.0) * 1000, 3),
+        },
+    }
+    if loop_lag is not None:
+        summary["loop_lag_ms"] = {
+            "p50": round(percentile(loop_lag, 50) * 1000, 3),
+            "p99": round(percentile(loop_lag, 99) * 1000, 3),
+            "max": round(max(loop_lag, default=0.0) * 1000, 3),
+        }
+    return summary
+
+
+async def timed(coro) -> tuple[float, bool]:
+    """Awaits `coro` and returns (latency in seconds, succeeded)"""
+    start = time.perf_counter()
+    try:
+        ok = await coro
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok is not False
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(name: str, scenarios: dict, config: dict, output: Path | None = None):
+    """Stores a run as JSON under `benchmarks/results/` and returns the path"""
+    commit = git_commit()
+    payload = {
+        "benchmark": name,
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "scenarios": scenarios,
+    }
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{name}-{commit}-{stamp}.json"
+    output.write_text(json.dumps(payload, indent=2))
+    return output
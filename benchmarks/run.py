@@ -0,0 +1,184 @@
+"""Offline load test for the API.
+
+Usage:
+    python -m benchmarks.run --users 200 --concurrency 20 --bot-sessions 20
+
+Bot scenarios only run when `main.py` can be imported, see `benchmarks.harness`.
+Each scenario reports throughput, p50/p95/p99 latency and event-loop lag, and
+the whole run is written to `benchmarks/results/` for comparison across commits
+with `python -m benchmarks.compare`.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from pathlib import Path
+
+from benchmarks.harness import LoopLagMonitor, WebSocketSession, running_app
+from benchmarks.reporting import summarize, timed, write_results
+
+PASSWORD = "Secure@123"
+
+
+def user_payload(i: int) -> dict:
+    """A `CreateUserRequest` body that passes every validator"""
+    return {
+        "email": f"bench{i}@example.com",
+        "first_name": "Bench",
+        "last_name": "Tester",
+        "phone_number": f"26481{i:07d}",
+        "password": PASSWORD,
+        "verify_password": PASSWORD,
+        "national_id_number": f"900101{i:05d}",
+        "dob": {"day": "01", "month": "01", "year": "1990"},
+    }
+
+
+async def run_concurrently(jobs: list, concurrency: int) -> dict:
+    """Runs coroutine factories with bounded concurrency and summarizes them"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker(job):
+        nonlocal errors
+        async with semaphore:
+            latency, ok = await timed(job())
+        latencies.append(latency)
+        if not ok:
+            errors += 1
+
+    async with LoopLagMonitor() as lag:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(job) for job in jobs))
+        elapsed = time.perf_counter() - start
+
+    return summarize(latencies, elapsed, errors, lag.samples)
+
+
+async def create_users(client, count: int, concurrency: int) -> dict:
+    async def create(i):
+        response = await client.post("/api/v1/users", json=user_payload(i))
+        return response.status_code == 201
+
+    return await run_concurrently(
+        [lambda i=i: create(i) for i in range(count)], concurrency
+    )
+
+
+async def login_burst(client, count: int, concurrency: int) -> dict:
+    async def login(i):
+        response = await client.post(
+            "/login", data={"username": f"bench{i}@example.com", "password": PASSWORD}
+        )
+        return response.status_code == 200
+
+    return await run_concurrently(
+        [lambda i=i: login(i) for i in range(count)], concurrency
+    )
+
+
+async def profile_fetches(client, users: int, requests: int, concurrency: int):
+    rng = random.Random(2623)
+
+    async def fetch(i):
+        response = await client.post(f"/api/v1/users/bench{i}@example.com")
+        return response.status_code == 200
+
+    return await run_concurrently(
+        [lambda i=rng.randrange(users): fetch(i) for _ in range(requests)],
+        concurrency,
+    )
+
+
+async def bot_sessions(app, sessions: int, messages: int) -> dict:
+    """Concurrent WebSocket sessions, latency is measured per message"""
+    latencies: list[float] = []
+    errors = 0
+
+    async def session(n):
+        nonlocal errors
+        try:
+            async with WebSocketSession(app, "/api/v1/bot/chat") as websocket:
+                for m in range(messages):
+                    start = time.perf_counter()
+                    await websocket.send_text(f"Session {n} question {m} on the rule of law")
+                    await websocket.receive_text()
+                    latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+
+    async with LoopLagMonitor() as lag:
+        start = time.perf_counter()
+        await asyncio.gather(*(session(n) for n in range(sessions)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(latencies, elapsed, errors, lag.samples)
+
+
+async def mixed(app, client, users: int, requests: int, concurrency: int) -> dict:
+    """Logins, profile reads and bot sessions running at the same time"""
+    jobs = {
+        "login": login_burst(client, min(users, requests // 4 or 1), concurrency),
+        "profile": profile_fetches(client, users, requests, concurrency),
+    }
+    if app.state.has_bot:
+        jobs["bot"] = bot_sessions(app, max(1, concurrency // 2), 3)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*jobs.values())
+    return {
+        "elapsed_s": round(time.perf_counter() - start, 4),
+        **dict(zip(jobs, results)),
+    }
+
+
+async def main(args):
+    scenarios = {}
+    async with running_app() as (app, client):
+        scenarios["create_users"] = await create_users(
+            client, args.users, args.concurrency
+        )
+        scenarios["login_burst"] = await login_burst(
+            client, args.users, args.concurrency
+        )
+        scenarios["profile_fetch"] = await profile_fetches(
+            client, args.users, args.requests, args.concurrency
+        )
+        if app.state.has_bot:
+            scenarios["bot_sessions"] = await bot_sessions(
+                app, args.bot_sessions, args.bot_messages
+            )
+        scenarios["mixed"] = await mixed(
+            app, client, args.users, args.requests, args.concurrency
+        )
+
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    path = write_results("load", scenarios, config, args.output)
+    for name, summary in scenarios.items():
+        if "latency_ms" in summary:
+            print(
+                f"{name:<14} {summary['throughput_ops_s']:>9} ops/s  "
+                f"p50 {summary['latency_ms']['p50']:>8} ms  "
+                f"p99 {summary['latency_ms']['p99']:>8} ms  "
+                f"lag p99 {summary['loop_lag_ms']['p99']:>7} ms  "
+                f"errors {summary['errors']}"
+            )
+    print(f"Results written to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--bot-sessions", type=int, default=20)
+    parser.add_argument("--bot-messages", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
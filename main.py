@@ -1,3 +1,5 @@
+import math
+
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -8,7 +10,24 @@ from fastapi.responses import HTMLResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 
-from src.routers import auth, users, posts, polls, announcements, sentiments, bot
+from src.routers import (
+    auth,
+    users,
+    posts,
+    polls,
+    announcements,
+    sentiments,
+    bot,
+    comments,
+    votes,
+    reactions,
+    images,
+    events,
+)
+from src.helpers.background_tasks import background_workers
+from src.utils.rate_limit import bot_chat_rate_limit
+from src.utils.responses import ModelJSONResponse
+from src.utils.compression import CompressionMiddleware
 
 from contextlib import asynccontextmanager
 
@@ -68,14 +87,20 @@ chat_bot = {}
 
 
 file_path = "./Law_1-Rule_of_Law.pdf"
-loader = PyPDFLoader(file_path, extract_images=True)
 
-data = loader.load()
 
+def load_documents():
+    loader = PyPDFLoader(file_path, extract_images=True)
+    return loader.load()
+
+
+def init_bot(documents=None, embeddings=embeddings, model=model):
+    """Builds the RAG chain, defaults to the constitution PDF and Ollama models"""
+    if documents is None:
+        documents = load_documents()
 
-def init_bot():
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
-    splits = text_splitter.split_documents(data)
+    splits = text_splitter.split_documents(documents)
 
     print("Done splitting")
 
@@ -109,32 +134,26 @@ def init_bot():
     return rag_chain
 
 
-async def initialize_database():
-    client = AsyncIOMotorClient("mongodb://localhost:27017")
+async def initialize_database(client=None):
+    if client is None:
+        client = AsyncIOMotorClient("mongodb://localhost:27017")
     database = client["mict-hackathon"]
-    await init_beanie(
-        database,
-        document_models=[
-            models.User,
-            models.VerifiedUser,
-            models.Poll,
-            models.Post,
-            models.Announcements,
-        ],
-    )
+    await init_beanie(database, document_models=models.DOCUMENT_MODELS)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     chat_bot["rag_chain"] = init_bot()
     await initialize_database()
-    yield
+    async with background_workers():
+        yield
 
 
 app = FastAPI(
     lifespan=lifespan,
     title="MICT Hackathon API",
     description="API for the MICT Hackathon",
+    default_response_class=ModelJSONResponse,
 )
 
 app.add_middleware(
@@ -144,6 +163,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 
 @app.get("/api/v1/bot/", tags=["Bot"])
@@ -157,6 +177,15 @@ async def chat_with_bot(websocket: WebSocket):
 
     while True:
         data = await websocket.receive_text()
+
+        # * Limit each message, one connection could otherwise queue endless generations
+        retry_after = await bot_chat_rate_limit.check(websocket)
+        if retry_after:
+            await websocket.send_text(
+                f"Too many messages, try again in {math.ceil(retry_after)} seconds"
+            )
+            continue
+
         response = chat_bot["rag_chain"].invoke({"input": data})
         await websocket.send_text(response["answer"])
 
@@ -167,3 +196,8 @@ app.include_router(posts.router)
 app.include_router(polls.router)
 app.include_router(announcements.router)
 app.include_router(sentiments.router)
+app.include_router(comments.router)
+app.include_router(votes.router)
+app.include_router(reactions.router)
+app.include_router(images.router)
+app.include_router(events.router)
@@ -1,4 +1,15 @@
+import asyncio
+
+from contextlib import asynccontextmanager
+
 from src.models import User, VerifiedUser
+from src.helpers.polls import (
+    run_poll_results_publisher,
+    run_poll_scheduler,
+    vote_counters,
+)
+from src.helpers.reactions import reaction_counters
+from src.utils.broadcast import get_broadcaster
 
 from pydantic import EmailStr
 
@@ -17,3 +28,26 @@ async def add_permissions_and_fields_to_verified_user(user_id: EmailStr):
 
     # * Create a verified user
     await VerifiedUser.insert(VerifiedUser(**user.model_dump(by_alias=True)))
+
+
+@asynccontextmanager
+async def background_workers():
+    """Runs the poll scheduler, counters and live events while the app is up"""
+    broadcaster = get_broadcaster()
+    await broadcaster.start()
+    vote_counters.start()
+    reaction_counters.start()
+    tasks = [
+        asyncio.create_task(run_poll_scheduler()),
+        asyncio.create_task(run_poll_results_publisher()),
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # * Write buffered votes and reactions before the worker exits
+        await vote_counters.stop()
+        await reaction_counters.stop()
+        await broadcaster.stop()
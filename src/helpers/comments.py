@@ -0,0 +1,66 @@
+from beanie import PydanticObjectId, UpdateResponse
+from beanie.operators import Inc
+
+from src.models import Announcements, CommentBucket, CommentEntry, Poll, Post
+
+COMMENT_BUCKET_SIZE = 100
+
+PARENT_MODELS = {
+    "posts": Post,
+    "polls": Poll,
+    "announcements": Announcements,
+}
+
+
+async def add_comment(
+    parent_type: str, parent_id: PydanticObjectId, entry: CommentEntry
+) -> CommentEntry | None:
+    """Appends `entry` to the newest comment bucket of a post, poll or announcement.
+
+    Returns None if the parent does not exist.
+    """
+    model = PARENT_MODELS[parent_type]
+
+    # * The parent's counter hands out positions, so concurrent comments
+    # * never overfill a bucket
+    parent = await model.find_one(model.id == parent_id).update(
+        Inc({model.comment_count: 1}), response_type=UpdateResponse.NEW_DOCUMENT
+    )
+    if parent is None:
+        return None
+
+    bucket = (parent.comment_count - 1) // COMMENT_BUCKET_SIZE
+    await CommentBucket.get_motor_collection().update_one(
+        {"parent_type": parent_type, "parent_id": parent_id, "bucket": bucket},
+        {"$push": {"comments": entry.model_dump()}, "$inc": {"size": 1}},
+        upsert=True,
+    )
+    return entry
+
+
+async def get_comment_page(
+    parent_type: str, parent_id: PydanticObjectId, before: int | None = None
+) -> dict:
+    """Returns one bucket of comments, newest first.
+
+    Pass the returned `next_cursor` as `before` to get older comments.
+    """
+    filters = [
+        CommentBucket.parent_type == parent_type,
+        CommentBucket.parent_id == parent_id,
+    ]
+    if before is not None:
+        filters.append(CommentBucket.bucket < before)
+
+    bucket = (
+        await CommentBucket.find(*filters)
+        .sort(-CommentBucket.bucket)
+        .first_or_none()
+    )
+    if bucket is None:
+        return {"items": [], "next_cursor": None}
+
+    return {
+        "items": bucket.comments[::-1],
+        "next_cursor": bucket.bucket if bucket.bucket > 0 else None,
+    }
@@ -0,0 +1,235 @@
+"""Post image upload, thumbnails and conditional/ranged delivery"""
+
+import io
+import os
+
+from typing import AsyncIterator
+
+from beanie import PydanticObjectId
+from beanie.operators import Set
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from PIL import Image, UnidentifiedImageError
+
+from dotenv import load_dotenv
+
+from src.models import ImageVariant, Post, PostImage
+from src.utils.storage import get_storage
+
+load_dotenv()
+
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "320"))
+
+# * Declared content type and the Pillow format its bytes must have
+IMAGE_TYPES = {
+    "image/jpeg": "JPEG",
+    "image/png": "PNG",
+    "image/webp": "WEBP",
+    "image/gif": "GIF",
+}
+
+# * Enough for any header Pillow needs to identify the image
+SNIFF_BYTES = 1024 * 1024
+
+
+def too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Image must be at most {MAX_IMAGE_BYTES} bytes",
+    )
+
+
+async def read_upload(request: Request) -> AsyncIterator[bytes]:
+    """Streams the request body as it arrives, stopping past `MAX_IMAGE_BYTES`"""
+    # * Nothing is buffered or spooled first, so the cap bounds what is read
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_IMAGE_BYTES:
+        raise too_large()
+
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_IMAGE_BYTES:
+            raise too_large()
+        if chunk:
+            yield chunk
+
+
+def image_format(head: bytes) -> str | None:
+    """Returns the Pillow format of the image starting with `head`, if any"""
+    try:
+        with Image.open(io.BytesIO(head)) as image:
+            return image.format
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+
+
+async def checked_upload(request: Request, content_type: str) -> AsyncIterator[bytes]:
+    """Streams the upload once its bytes are confirmed to match `content_type`"""
+    chunks = read_upload(request)
+    head = b""
+    detected = None
+    async for chunk in chunks:
+        head += chunk
+        detected = image_format(head)
+        if detected or len(head) >= SNIFF_BYTES:
+            break
+
+    if not head:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Image is empty"
+        )
+    if detected != IMAGE_TYPES[content_type]:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Body is not a valid {content_type} image",
+        )
+
+    yield head
+    async for chunk in chunks:
+        yield chunk
+
+
+async def store_post_image(post: Post, request: Request) -> PostImage:
+    """Stores the image sent as the raw body of `request` as the post's image"""
+    content_type = request.headers.get("content-type", "")
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type not in IMAGE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Image must be a JPEG, PNG, WebP or GIF",
+        )
+
+    storage = get_storage()
+    key = f"posts/{post.id}/{PydanticObjectId()}"
+    stored = await storage.save(
+        key, checked_upload(request, content_type), content_type
+    )
+
+    image = PostImage(
+        key=key, content_type=content_type, size=stored.size, etag=stored.etag
+    )
+    # * Collect the keys first, updating the post rewrites its image in place
+    replaced = []
+    if isinstance(post.image, PostImage):
+        replaced.append(post.image.key)
+        if post.image.thumbnail:
+            replaced.append(post.image.thumbnail.key)
+    await post.update(Set({Post.image: image}))
+
+    # * Remove the replaced image only once nothing points at it any more
+    for previous_key in replaced:
+        await storage.delete(previous_key)
+    return image
+
+
+def render_thumbnail(data: bytes) -> bytes:
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    output = io.BytesIO()
+    image.convert("RGB").save(output, format="JPEG", quality=80, optimize=True)
+    return output.getvalue()
+
+
+async def create_thumbnail(post_id: PydanticObjectId, image: PostImage):
+    """Stores a downscaled JPEG of `image` and attaches it to the post"""
+    storage = get_storage()
+    data = b"".join([chunk async for chunk in storage.open(image.key)])
+    try:
+        thumbnail = await run_in_threadpool(render_thumbnail, data)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        # * A header that parsed but a body that does not, keep the original only
+        print(e)
+        return
+
+    async def chunks():
+        yield thumbnail
+
+    key = f"{image.key}-thumbnail"
+    stored = await storage.save(key, chunks(), "image/jpeg")
+    variant = ImageVariant(
+        key=key, content_type="image/jpeg", size=stored.size, etag=stored.etag
+    )
+
+    # * Only attach it if the image was not replaced in the meantime
+    result = await Post.find_one(Post.id == post_id, {"image.key": image.key}).update(
+        Set({"image.thumbnail": variant.model_dump()})
+    )
+    if not result or result.matched_count == 0:
+        await storage.delete(key)
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Parses a single `bytes=` range, None means serve the whole image.
+
+    Raises ValueError for ranges that cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        # * Multiple ranges are rare for images, ignoring them is allowed
+        return None
+
+    start, _, end = header[6:].strip().partition("-")
+    if not start:
+        if not end:
+            raise ValueError(header)
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+async def image_response(request: Request, image: ImageVariant) -> Response:
+    etag = f'"{image.etag}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=60",
+        # * Browsers must not reinterpret the bytes as anything but an image
+        "X-Content-Type-Options": "nosniff",
+    }
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        byte_range = parse_range(request.headers.get("Range"), image.size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{image.size}"},
+        )
+
+    storage = get_storage()
+    if byte_range is None:
+        return StreamingResponse(
+            storage.open(image.key),
+            media_type=image.content_type,
+            headers={**headers, "Content-Length": str(image.size)},
+        )
+
+    start, end = byte_range
+    return StreamingResponse(
+        storage.open(image.key, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=image.content_type,
+        headers={
+            **headers,
+            "Content-Length": str(end - start + 1),
+            "Content-Range": f"bytes {start}-{end}/{image.size}",
+        },
+    )
@@ -0,0 +1,26 @@
+from beanie import Document, PydanticObjectId
+
+
+async def keyset_page(
+    model: type[Document],
+    *filters,
+    limit: int = 20,
+    after: PydanticObjectId | None = None,
+) -> dict:
+    """Returns a page of `model` documents, newest first.
+
+    Pages are cut on `_id` rather than skipped over, so every page costs one
+    index range scan however deep the client has scrolled. Pass the returned
+    `next_cursor` as `after` to get the following page.
+    """
+    if after is not None:
+        filters = (*filters, model.id < after)
+
+    documents = await model.find(*filters).sort(-model.id).limit(limit + 1).to_list()
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+
+    return {
+        "items": documents,
+        "next_cursor": str(documents[-1].id) if has_more else None,
+    }
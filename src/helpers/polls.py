@@ -0,0 +1,216 @@
+"""Poll voting and closing.
+
+Votes are recorded in `poll_votes`, whose unique index enforces one vote per
+user, and counted with a positional `$inc` on the poll's option. With
+`POLL_VOTE_FLUSH_INTERVAL` set (seconds), the `$inc`s are coalesced in memory
+and flushed in batches, which keeps bursts of votes off the poll document.
+
+`run_poll_scheduler` closes polls whose `duration` has passed and freezes their
+results, counted from `poll_votes` so votes still buffered in other workers are
+not lost.
+Polls stored before they had a closing time only get one from
+`src.migrations.backfill_poll_schedule`.
+
+Result updates are pushed to live clients at most once per poll every
+`POLL_RESULTS_INTERVAL` seconds (default 1), however many votes arrive.
+"""
+
+import asyncio
+import os
+
+from collections import OrderedDict
+from datetime import datetime
+
+from beanie import PydanticObjectId
+from beanie.operators import Set
+from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
+
+from dotenv import load_dotenv
+
+from src.models import Poll, PollOptions, PollResults, PollVote
+from src.utils.broadcast import get_broadcaster
+from src.utils.counters import make_counter_buffer
+
+load_dotenv()
+
+vote_counters = make_counter_buffer(
+    float(os.getenv("POLL_VOTE_FLUSH_INTERVAL", "0")), [Poll], name="poll-votes"
+)
+
+POLL_CACHE_SIZE = 1000
+
+# * Polls voted on since results were last published
+_updated_polls: set[PydanticObjectId] = set()
+
+# * Options and closing time never change, so votes skip re-reading the poll
+_poll_cache: OrderedDict[PydanticObjectId, tuple[frozenset[str], datetime]] = (
+    OrderedDict()
+)
+
+
+async def get_poll_options(
+    poll_id: PydanticObjectId,
+) -> tuple[frozenset[str], datetime]:
+    cached = _poll_cache.get(poll_id)
+    if cached is not None:
+        return cached
+
+    poll = await Poll.get(poll_id)
+    if poll is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Poll not found"
+        )
+
+    cached = _poll_cache[poll_id] = (
+        frozenset(option.option for option in poll.options),
+        poll.closes_at,
+    )
+    if len(_poll_cache) > POLL_CACHE_SIZE:
+        _poll_cache.popitem(last=False)
+    return cached
+
+
+async def cast_vote(poll_id: PydanticObjectId, option: str, voter: str):
+    options, closes_at = await get_poll_options(poll_id)
+
+    if option not in options:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid poll option",
+        )
+    if closes_at <= datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Poll is closed"
+        )
+
+    try:
+        await PollVote(poll_id=poll_id, voter=voter, option=option).insert()
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="You have already voted on this poll",
+        )
+
+    # * Keeps late increments off polls whose results are frozen. Polls stored
+    # * before they could close have no `closed` field, so match on `$ne`
+    match = {"_id": poll_id, "closed": {"$ne": True}, "options.option": option}
+    _updated_polls.add(poll_id)
+    try:
+        if vote_counters.enabled:
+            await vote_counters.increment(Poll, match, "options.$.votes")
+            return
+
+        result = await Poll.get_motor_collection().update_one(
+            match, {"$inc": {"options.$.votes": 1}}
+        )
+    except Exception:
+        # * Otherwise the uncounted vote would block the user from voting again
+        await remove_vote(poll_id, voter)
+        raise
+
+    if result.matched_count == 0:
+        await remove_vote(poll_id, voter)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Poll is closed"
+        )
+
+
+async def remove_vote(poll_id: PydanticObjectId, voter: str):
+    await PollVote.find_one(
+        PollVote.poll_id == poll_id, PollVote.voter == voter
+    ).delete()
+
+
+async def get_results(poll_id: PydanticObjectId) -> dict:
+    poll = await Poll.get(poll_id)
+    if poll is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Poll not found"
+        )
+
+    results = poll.results or PollResults(
+        total_votes=sum(option.votes for option in poll.options),
+        options=poll.options,
+    )
+    return {"closed": poll.closed, **results.model_dump(mode="json")}
+
+
+async def close_poll(poll: Poll) -> PollResults:
+    """Counts the votes for `poll`, then marks it closed with frozen results"""
+    counts = {
+        row["_id"]: row["votes"]
+        for row in await PollVote.find(PollVote.poll_id == poll.id)
+        .aggregate([{"$group": {"_id": "$option", "votes": {"$sum": 1}}}])
+        .to_list()
+    }
+    options = [
+        PollOptions(option=option.option, votes=counts.get(option.option, 0))
+        for option in poll.options
+    ]
+    results = PollResults(total_votes=sum(counts.values()), options=options)
+
+    await Poll.find_one(Poll.id == poll.id, Poll.closed != True).update(
+        Set({Poll.closed: True, Poll.options: options, Poll.results: results})
+    )
+    await get_broadcaster().publish(
+        "polls",
+        "poll_results",
+        {"poll_id": str(poll.id), "closed": True, **results.model_dump(mode="json")},
+    )
+    return results
+
+
+async def close_expired_polls() -> int:
+    """Closes every open poll past its `closes_at`, returns how many were closed"""
+    await vote_counters.flush()
+
+    expired = await Poll.find(
+        Poll.closed == False, Poll.closes_at <= datetime.now()
+    ).to_list()
+    for poll in expired:
+        await close_poll(poll)
+    return len(expired)
+
+
+async def run_poll_scheduler(interval: float | None = None):
+    if interval is None:
+        interval = float(os.getenv("POLL_CLOSE_INTERVAL", "5"))
+
+    while True:
+        try:
+            await close_expired_polls()
+        except Exception as e:
+            # * Keep the scheduler alive, the next sweep retries
+            print(e)
+        await asyncio.sleep(interval)
+
+
+async def publish_poll_results():
+    """Pushes current results for every poll voted on since the last call"""
+    if not _updated_polls:
+        return
+
+    # * Buffered votes would otherwise be missing from the published counts
+    await vote_counters.flush()
+
+    poll_ids = list(_updated_polls)
+    _updated_polls.clear()
+    broadcaster = get_broadcaster()
+    for poll_id in poll_ids:
+        results = await get_results(poll_id)
+        await broadcaster.publish(
+            "polls", "poll_results", {"poll_id": str(poll_id), **results}
+        )
+
+
+async def run_poll_results_publisher(interval: float | None = None):
+    if interval is None:
+        interval = float(os.getenv("POLL_RESULTS_INTERVAL", "1"))
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await publish_poll_results()
+        except Exception as e:
+            print(e)
@@ -0,0 +1,117 @@
+"""Likes and dislikes on posts and announcements.
+
+Each user's reaction to an item is recorded in `reactions`, whose unique index
+allows one per user, so repeated clicks are refused and a like can only be
+switched to a dislike or back. The counter changes are buffered by a
+`CounterBuffer` and flushed as batched `$inc`s every `REACTION_FLUSH_INTERVAL`
+seconds (default 1, 0 writes every click directly). Counts returned here
+include increments that are still buffered, so the user who clicked sees their
+own click straight away.
+"""
+
+import asyncio
+import os
+
+from beanie import PydanticObjectId
+from beanie.operators import Set
+from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
+
+from dotenv import load_dotenv
+
+from src.models import Announcements, Post, Reaction, ReactionCounts
+from src.utils.counters import make_counter_buffer
+
+load_dotenv()
+
+REACTION_MODELS = {
+    "posts": Post,
+    "announcements": Announcements,
+}
+
+reaction_counters = make_counter_buffer(
+    float(os.getenv("REACTION_FLUSH_INTERVAL", "1")),
+    list(REACTION_MODELS.values()),
+    name="reactions",
+)
+
+
+async def get_reactions(
+    item_type: str, item_id: PydanticObjectId
+) -> ReactionCounts | None:
+    """Returns stored plus buffered counts, None if the item does not exist"""
+    model = REACTION_MODELS[item_type]
+    counts = await model.find_one(model.id == item_id).project(ReactionCounts)
+    if counts is None:
+        return None
+    return await add_pending(item_type, item_id, counts)
+
+
+async def add_pending(item_type: str, item_id: PydanticObjectId, counts):
+    """Adds buffered increments to `counts`, anything with likes and dislikes"""
+    model = REACTION_MODELS[item_type]
+    match = {"_id": item_id}
+    likes, dislikes = await asyncio.gather(
+        reaction_counters.pending(model, match, "likes"),
+        reaction_counters.pending(model, match, "dislikes"),
+    )
+    counts.likes += likes
+    counts.dislikes += dislikes
+    return counts
+
+
+async def react(
+    item_type: str, item_id: PydanticObjectId, reaction: str, user: str
+) -> ReactionCounts | None:
+    """Records `user`'s like or dislike, returns the counts including it"""
+    model = REACTION_MODELS[item_type]
+    if await model.find(model.id == item_id).count() == 0:
+        return None
+
+    other = "dislikes" if reaction == "likes" else "likes"
+    try:
+        await Reaction(
+            item_type=item_type, item_id=item_id, user=user, reaction=reaction
+        ).insert()
+        deltas = {reaction: 1}
+    except DuplicateKeyError:
+        # * Only a reaction the other way can be switched over
+        switched = await set_reaction(item_type, item_id, user, other, reaction)
+        if switched.modified_count == 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="You have already reacted this way",
+            )
+        deltas = {reaction: 1, other: -1}
+
+    match = {"_id": item_id}
+    try:
+        if reaction_counters.enabled:
+            for field, amount in deltas.items():
+                await reaction_counters.increment(model, match, field, amount)
+        else:
+            await model.get_motor_collection().update_one(match, {"$inc": deltas})
+    except Exception:
+        # * Otherwise the recorded reaction would never be counted
+        if other in deltas:
+            await set_reaction(item_type, item_id, user, reaction, other)
+        else:
+            await Reaction.find_one(
+                Reaction.item_type == item_type,
+                Reaction.item_id == item_id,
+                Reaction.user == user,
+            ).delete()
+        raise
+    return await get_reactions(item_type, item_id)
+
+
+async def set_reaction(
+    item_type: str, item_id: PydanticObjectId, user: str, old: str, new: str
+):
+    """Switches `user`'s reaction from `old` to `new` if it is still `old`"""
+    return await Reaction.find_one(
+        Reaction.item_type == item_type,
+        Reaction.item_id == item_id,
+        Reaction.user == user,
+        Reaction.reaction == old,
+    ).update(Set({Reaction.reaction: new}))
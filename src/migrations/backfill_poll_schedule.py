@@ -0,0 +1,84 @@
+"""Adds the closing schedule to polls stored before polls could close.
+
+Sets `created_at` (from the poll's ObjectId), `closes_at` (`created_at` plus
+`duration`) and `closed: false` on polls missing them, so the scheduler picks
+them up and closes those that have already run out.
+
+Usage:
+    python -m src.migrations.backfill_poll_schedule [--dry-run]
+
+Only missing fields are written, so the migration can be run again safely.
+"""
+
+import argparse
+import asyncio
+
+from datetime import timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+BATCH_SIZE = 1000
+
+
+def creation_time(poll: dict):
+    """Local naive time, the same form `datetime.now()` stores for new polls"""
+    return poll["_id"].generation_time.astimezone().replace(tzinfo=None)
+
+
+async def backfill_polls(database, dry_run: bool) -> int:
+    updated = 0
+    operations = []
+    legacy_polls = database["polls"].find(
+        {
+            "$or": [
+                {"created_at": {"$exists": False}},
+                {"closes_at": {"$exists": False}},
+                {"closed": {"$exists": False}},
+            ]
+        },
+        projection={"created_at": 1, "closes_at": 1, "closed": 1, "duration": 1},
+    )
+
+    async for poll in legacy_polls:
+        created_at = poll.get("created_at") or creation_time(poll)
+        fields = {
+            "created_at": created_at,
+            "closes_at": poll.get("closes_at")
+            or created_at + timedelta(seconds=poll.get("duration") or 0),
+            "closed": poll.get("closed", False),
+        }
+        operations.append(UpdateOne({"_id": poll["_id"]}, {"$set": fields}))
+        updated += 1
+
+        if len(operations) >= BATCH_SIZE:
+            if not dry_run:
+                await database["polls"].bulk_write(operations, ordered=False)
+            operations = []
+
+    if operations and not dry_run:
+        await database["polls"].bulk_write(operations, ordered=False)
+    return updated
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongo_url)
+    database = client[args.database]
+
+    count = await backfill_polls(database, args.dry_run)
+    print(f"polls: {count} given a closing schedule")
+
+    if args.dry_run:
+        print("Dry run, nothing was written")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="mict-hackathon")
+    parser.add_argument("--dry-run", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,132 @@
+"""Moves images embedded in posts into blob storage.
+
+Posts stored before images went to blob storage hold the image itself in an
+`image` dict, as raw bytes or base64 (optionally a `data:` URL). The bytes are
+written to the storage configured by `STORAGE_BACKEND`, with a thumbnail, and
+the dict is replaced by the same `PostImage` an upload stores, so the image is
+served and linked from feeds again.
+
+Usage:
+    python -m src.migrations.move_post_images [--dry-run]
+
+Posts that already have a `PostImage` are not touched, so the migration can be
+run again safely. Dicts holding no JPEG, PNG, WebP or GIF data are left as they
+are and reported.
+"""
+
+import argparse
+import asyncio
+import base64
+import binascii
+
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from motor.motor_asyncio import AsyncIOMotorClient
+from PIL import Image
+
+from src.helpers.images import IMAGE_TYPES, SNIFF_BYTES, image_format, render_thumbnail
+from src.models import ImageVariant, PostImage
+from src.utils.storage import CHUNK_SIZE, get_storage
+
+CONTENT_TYPES = {format: content_type for content_type, format in IMAGE_TYPES.items()}
+
+
+def legacy_image(image: dict) -> tuple[bytes, str] | None:
+    """Returns the bytes and content type of the image embedded in `image`"""
+    for value in image.values():
+        if isinstance(value, bytes):
+            data = value
+        elif isinstance(value, str):
+            _, _, encoded = value.rpartition("base64,")
+            try:
+                data = base64.b64decode(encoded, validate=True)
+            except (binascii.Error, ValueError):
+                continue
+        else:
+            continue
+
+        content_type = CONTENT_TYPES.get(image_format(data[:SNIFF_BYTES]))
+        if content_type:
+            return bytes(data), content_type
+    return None
+
+
+async def save(storage, key: str, data: bytes, content_type: str) -> ImageVariant:
+    async def chunks():
+        for start in range(0, len(data), CHUNK_SIZE):
+            yield data[start : start + CHUNK_SIZE]
+
+    stored = await storage.save(key, chunks(), content_type)
+    return ImageVariant(
+        key=key, content_type=content_type, size=stored.size, etag=stored.etag
+    )
+
+
+async def move_post_images(database, dry_run: bool) -> tuple[int, int]:
+    """Returns how many images were moved and how many were left in place"""
+    moved = skipped = 0
+    storage = get_storage()
+    legacy_posts = database["posts"].find(
+        {"image": {"$type": "object"}, "image.key": {"$exists": False}},
+        projection={"image": 1},
+    )
+
+    async for post in legacy_posts:
+        found = legacy_image(post["image"])
+        if found is None:
+            skipped += 1
+            continue
+        moved += 1
+        if dry_run:
+            continue
+
+        data, content_type = found
+        key = f"posts/{post['_id']}/{ObjectId()}"
+        original = await save(storage, key, data, content_type)
+        image = PostImage(**original.model_dump())
+        try:
+            thumbnail = await run_in_threadpool(render_thumbnail, data)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            print(e)
+        else:
+            image.thumbnail = await save(
+                storage, f"{key}-thumbnail", thumbnail, "image/jpeg"
+            )
+
+        # * Only replace the image this run read, a newer upload wins
+        result = await database["posts"].update_one(
+            {"_id": post["_id"], "image": post["image"]},
+            {"$set": {"image": image.model_dump()}},
+        )
+        if result.matched_count == 0:
+            moved -= 1
+            await storage.delete(key)
+            if image.thumbnail:
+                await storage.delete(image.thumbnail.key)
+
+    return moved, skipped
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongo_url)
+    database = client[args.database]
+
+    moved, skipped = await move_post_images(database, args.dry_run)
+    print(f"posts: {moved} images moved to blob storage")
+    if skipped:
+        print(f"posts: {skipped} images left in place, no image data found")
+
+    if args.dry_run:
+        print("Dry run, nothing was written")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="mict-hackathon")
+    parser.add_argument("--dry-run", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,145 @@
+"""Moves embedded lists out of existing documents.
+
+- `polls`, `posts` and `announcements` embedded in verified users are written
+  to their own collections, with the user's email as `author`
+- `comments` arrays on posts, polls and announcements are split into
+  `comment_buckets` and replaced by a `comment_count`
+
+Usage:
+    python -m src.migrations.split_embedded_lists [--dry-run]
+
+Buckets and moved items are upserted before the source fields are unset, so a
+run that is interrupted can simply be started again. A user list holding
+entries that are not documents is left on the user and reported.
+"""
+
+import argparse
+import asyncio
+
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne, UpdateOne
+
+from src.helpers.comments import COMMENT_BUCKET_SIZE
+
+USER_LISTS = ("polls", "posts", "announcements")
+COMMENTED_COLLECTIONS = ("posts", "polls", "announcements")
+
+
+async def move_user_lists(database, dry_run: bool) -> tuple[dict, dict]:
+    """Returns how many items were moved and skipped, per list"""
+    moved = dict.fromkeys(USER_LISTS, 0)
+    skipped = dict.fromkeys(USER_LISTS, 0)
+    legacy_users = database["users"].find(
+        {"$or": [{field: {"$exists": True}} for field in USER_LISTS]},
+        projection={"email": 1, **dict.fromkeys(USER_LISTS, 1)},
+    )
+
+    async for user in legacy_users:
+        moved_fields = []
+        for field in USER_LISTS:
+            if field not in user:
+                continue
+            operations = []
+            unmovable = 0
+            for item in user.get(field) or []:
+                if not isinstance(item, dict):
+                    unmovable += 1
+                    continue
+                item = {**item, "author": item.get("author") or user["email"]}
+                # * Items embedded without an ID are matched on author and title,
+                # * so running the migration twice does not duplicate them
+                if "_id" in item:
+                    match = {"_id": item["_id"]}
+                else:
+                    match = {"author": item["author"], "title": item.get("title")}
+                operations.append(ReplaceOne(match, item, upsert=True))
+
+            moved[field] += len(operations)
+            if operations and not dry_run:
+                await database[field].bulk_write(operations, ordered=False)
+
+            # * Lists holding items that cannot be moved stay on the user, so
+            # * nothing is lost and they can be fixed by hand
+            if unmovable:
+                skipped[field] += unmovable
+                print(f"User {user['_id']}: {unmovable} {field} left in place")
+            else:
+                moved_fields.append(field)
+
+        if moved_fields and not dry_run:
+            await database["users"].update_one(
+                {"_id": user["_id"]}, {"$unset": dict.fromkeys(moved_fields, "")}
+            )
+    return moved, skipped
+
+
+async def bucket_comments(database, collection: str, dry_run: bool) -> int:
+    moved = 0
+    legacy_items = database[collection].find(
+        {"comments": {"$exists": True}}, projection={"comments": 1}
+    )
+
+    async for item in legacy_items:
+        comments = [
+            {"comment": comment, "author": None, "created_at": datetime.now()}
+            if isinstance(comment, str)
+            else comment
+            for comment in item.get("comments") or []
+        ]
+        operations = []
+        for bucket, start in enumerate(range(0, len(comments), COMMENT_BUCKET_SIZE)):
+            chunk = comments[start : start + COMMENT_BUCKET_SIZE]
+            operations.append(
+                UpdateOne(
+                    {
+                        "parent_type": collection,
+                        "parent_id": item["_id"],
+                        "bucket": bucket,
+                    },
+                    {"$set": {"comments": chunk, "size": len(chunk)}},
+                    upsert=True,
+                )
+            )
+
+        moved += len(comments)
+        if dry_run:
+            continue
+        if operations:
+            await database["comment_buckets"].bulk_write(operations, ordered=False)
+        await database[collection].update_one(
+            {"_id": item["_id"]},
+            {"$set": {"comment_count": len(comments)}, "$unset": {"comments": ""}},
+        )
+    return moved
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongo_url)
+    database = client[args.database]
+
+    moved, skipped = await move_user_lists(database, args.dry_run)
+    for field, count in moved.items():
+        print(f"{field}: {count} embedded items moved out of users")
+        if skipped[field]:
+            print(f"{field}: {skipped[field]} non-document items left on users")
+
+    for collection in COMMENTED_COLLECTIONS:
+        count = await bucket_comments(database, collection, args.dry_run)
+        print(f"{collection}: {count} comments moved into comment_buckets")
+
+    if args.dry_run:
+        print("Dry run, nothing was written")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="mict-hackathon")
+    parser.add_argument("--dry-run", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
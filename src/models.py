@@ -2,18 +2,30 @@
 
 import re
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from fastapi.responses import JSONResponse
 from fastapi import status, HTTPException, Form
 
-from pydantic import BaseModel, Field, EmailStr, model_validator, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    EmailStr,
+    computed_field,
+    model_validator,
+    field_validator,
+)
 
-from beanie import Document, Indexed
+from beanie import Document, Indexed, Insert, PydanticObjectId, after_event
 
-from typing import Annotated, Union
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from typing import Annotated, Literal, Union
 from typing_extensions import Self
 
+from src.utils.broadcast import get_broadcaster
+
 
 class DOB(BaseModel):
     """Model for Date of Birth"""
@@ -216,6 +228,10 @@ class User(Document, UserBase):
     )
 
 
+# * Left out whenever a user is returned by the API
+USER_PRIVATE_FIELDS = {"password", "national_id_number", "dob", "phone_number"}
+
+
 class PollOptions(BaseModel):
     option: str = Field(description="Option for the poll")
     votes: int = Field(description="Number of votes for the option", default=0)
@@ -240,48 +256,239 @@ class CreateAnnouncement(BaseModel):
     content: str = Field(description="Content of the announcement")
 
 
+# * Lets a user's items be listed newest first with keyset pagination
+AUTHOR_KEYSET_INDEX = IndexModel([("author", ASCENDING), ("_id", DESCENDING)])
+
+
 class Announcements(Document, CreateAnnouncement):
     class Settings:
         name = "announcements"
         is_root = True
+        indexes = [AUTHOR_KEYSET_INDEX]
 
-    comments: list[str] = Field(description="Comments on the announcement", default=[])
+    author: str | None = Field(description="Author of the announcement", default=None)
+    comment_count: int = Field(
+        description="Number of comments on the announcement", default=0
+    )
     likes: int = Field(description="Number of likes on the announcement", default=0)
     dislikes: int = Field(
         description="Number of dislikes on the announcement", default=0
     )
 
+    @after_event(Insert)
+    async def broadcast_announcement(self):
+        """Pushes new announcements to clients listening for live events"""
+        try:
+            await get_broadcaster().publish(
+                "announcements",
+                "announcement",
+                self.model_dump(mode="json", by_alias=True),
+            )
+        except Exception as e:
+            # * The announcement is already stored, a missed push must not fail it
+            print(e)
+
+
+class PollResults(BaseModel):
+    total_votes: int = Field(description="Number of votes cast on the poll")
+    options: list[PollOptions] = Field(description="Final votes for each option")
+
 
 class Poll(Document, CreatePoll):
     class Settings:
         name = "polls"
+        indexes = [
+            AUTHOR_KEYSET_INDEX,
+            # * Lets the scheduler find expired polls without a collection scan
+            IndexModel([("closed", ASCENDING), ("closes_at", ASCENDING)]),
+        ]
+
+    comment_count: int = Field(description="Number of comments on the poll", default=0)
+    created_at: datetime = Field(
+        description="Time the poll was created", default_factory=datetime.now
+    )
+    closes_at: datetime | None = Field(
+        description="Time the poll stops taking votes", default=None
+    )
+    closed: bool = Field(description="Whether the poll has closed", default=False)
+    results: PollResults | None = Field(
+        description="Results frozen when the poll closed", default=None
+    )
 
-    comments: list[str] = Field(description="Comments on the poll", default=[])
+    @model_validator(mode="after")
+    def set_closing_time(self) -> Self:
+        """Derives `closes_at` from `duration` when it is not stored yet"""
+        if "created_at" not in self.model_fields_set and self.id is not None:
+            # * Polls stored before `created_at` existed, use their ObjectId
+            # * so the closing time does not move on every load
+            self.created_at = self.id.generation_time.astimezone().replace(
+                tzinfo=None
+            )
+        if self.closes_at is None:
+            self.closes_at = self.created_at + timedelta(seconds=self.duration)
+        return self
+
+
+class CastVote(BaseModel):
+    option: str = Field(description="Option being voted for")
+
+
+class PollVote(Document):
+    """One document per vote, the unique index allows one vote per user per poll"""
+
+    class Settings:
+        name = "poll_votes"
+        indexes = [
+            IndexModel([("poll_id", ASCENDING), ("voter", ASCENDING)], unique=True)
+        ]
+
+    poll_id: PydanticObjectId = Field(description="ID of the poll")
+    voter: str = Field(description="Email address of the voter")
+    option: str = Field(description="Option voted for")
+    created_at: datetime = Field(
+        description="Time the vote was cast", default_factory=datetime.now
+    )
 
 
 class Comment(BaseModel):
     comment: str = Field(description="Comment on the post")
 
 
+class CommentEntry(Comment):
+    author: str | None = Field(description="Author of the comment", default=None)
+    created_at: datetime = Field(
+        description="Time the comment was made", default_factory=datetime.now
+    )
+
+
+class CommentBucket(Document):
+    """A fixed-size page of comments, so parents never embed an unbounded list"""
+
+    class Settings:
+        name = "comment_buckets"
+        indexes = [
+            IndexModel(
+                [
+                    ("parent_type", ASCENDING),
+                    ("parent_id", ASCENDING),
+                    ("bucket", DESCENDING),
+                ],
+                unique=True,
+            )
+        ]
+
+    parent_type: Literal["posts", "polls", "announcements"] = Field(
+        description="Collection of the commented item"
+    )
+    parent_id: PydanticObjectId = Field(description="ID of the commented item")
+    bucket: int = Field(description="Bucket number, 0 holds the oldest comments")
+    size: int = Field(description="Number of comments in the bucket", default=0)
+    comments: list[CommentEntry] = Field(
+        description="Comments in the bucket, oldest first", default=[]
+    )
+
+
+class ImageVariant(BaseModel):
+    key: str = Field(description="Key of the image in blob storage")
+    content_type: str = Field(description="MIME type of the image")
+    size: int = Field(description="Size of the image in bytes")
+    etag: str = Field(description="SHA-256 of the image")
+
+
+class PostImage(ImageVariant):
+    thumbnail: ImageVariant | None = Field(
+        description="Downscaled copy for feeds, once generated", default=None
+    )
+
+
 class Post(Document):
     class Settings:
         name = "posts"
+        indexes = [
+            AUTHOR_KEYSET_INDEX,
+            # * Images are served by author and title
+            IndexModel([("author", ASCENDING), ("title", ASCENDING)]),
+        ]
 
     title: str = Field(description="Title of the post")
     author: str = Field(description="Title of the post")
     content: str = Field(description="Content of the post")
-    image: dict | None = Field(description="Image of the post", default=None)
-    comments: list[str] = Field(description="Comments on the post", default=[])
+    image: PostImage | dict | None = Field(
+        description="Image of the post, stored in blob storage", default=None
+    )
+    comment_count: int = Field(description="Number of comments on the post", default=0)
     likes: int = Field(description="Number of likes on the post", default=0)
     dislikes: int = Field(description="Number of dislikes on the post", default=0)
 
 
-class VerifiedUser(User):
-    polls: list = Field(description="Polls created by the user", default=[])
-    posts: list = Field(description="Posts created by the user", default=[])
-    announcements: list = Field(
-        description="Announcements created by the user", default=[]
+class PostSummary(BaseModel):
+    """A post as listed in feeds, linking its image instead of describing it"""
+
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+    id: PydanticObjectId = Field(alias="_id")
+    title: str = Field(description="Title of the post")
+    author: str = Field(description="Author of the post")
+    content: str = Field(description="Content of the post")
+    stored_image: PostImage | dict | None = Field(
+        validation_alias="image", default=None, exclude=True
     )
+    comment_count: int = Field(description="Number of comments on the post", default=0)
+    likes: int = Field(description="Number of likes on the post", default=0)
+    dislikes: int = Field(description="Number of dislikes on the post", default=0)
+
+    @computed_field(description="URL of the image")
+    @property
+    def image(self) -> str | None:
+        # * Images still embedded in the post are not served, see
+        # * `src.migrations.move_post_images`
+        if not isinstance(self.stored_image, PostImage):
+            return None
+        return f"http://localhost:8000/api/v1/posts/{self.author}/{self.title}/image"
+
+    @computed_field(description="URL of the thumbnail, which feeds should load")
+    @property
+    def thumbnail(self) -> str | None:
+        # * The original is only fetched on demand
+        return f"{self.image}?size=thumbnail" if self.image else None
+
+
+class ReactionCounts(BaseModel):
+    likes: int = Field(description="Number of likes", default=0)
+    dislikes: int = Field(description="Number of dislikes", default=0)
+
+
+class Reaction(Document):
+    """One document per user per item, the unique index allows a single reaction"""
+
+    class Settings:
+        name = "reactions"
+        indexes = [
+            IndexModel(
+                [
+                    ("item_type", ASCENDING),
+                    ("item_id", ASCENDING),
+                    ("user", ASCENDING),
+                ],
+                unique=True,
+            )
+        ]
+
+    item_type: Literal["posts", "announcements"] = Field(
+        description="Collection of the item reacted to"
+    )
+    item_id: PydanticObjectId = Field(description="ID of the item reacted to")
+    user: str = Field(description="Email address of the user who reacted")
+    reaction: Literal["likes", "dislikes"] = Field(
+        description="Counter the reaction adds to"
+    )
+    created_at: datetime = Field(
+        description="Time of the reaction", default_factory=datetime.now
+    )
+
+
+class VerifiedUser(User):
+    """A verified user, their polls, posts and announcements are queried by author"""
 
 
 class Token(BaseModel):
@@ -297,3 +504,16 @@ class TokenData(BaseModel):
 class FakeLogin(BaseModel):
     email: EmailStr
     password: str
+
+
+# * Every collection the app reads or writes, registered with Beanie at startup
+DOCUMENT_MODELS = [
+    User,
+    VerifiedUser,
+    Poll,
+    Post,
+    Announcements,
+    CommentBucket,
+    PollVote,
+    Reaction,
+]
@@ -8,8 +8,10 @@ from typing import Annotated
 
 from dotenv import load_dotenv
 
+from src.utils.responses import ModelJSONResponse
 from src.utils.security import authenticate_user, create_access_token
-from src.models import FakeLogin, User, VerifiedUser
+from src.utils.rate_limit import login_rate_limit
+from src.models import FakeLogin, User, USER_PRIVATE_FIELDS
 
 load_dotenv()
 
@@ -17,7 +19,7 @@ load_dotenv()
 router = APIRouter(tags=["Auth"])
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(login_rate_limit)])
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ):
@@ -42,15 +44,12 @@ async def login_for_access_token(
 @router.post("/fake-login")
 async def fake_login_for_access_token(request: FakeLogin):
     user = await User.find_one(User.email == request.email, with_children=True)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+        )
 
-    try:
-        verified_user = VerifiedUser(**user.model_dump())
-        for post in verified_user.posts:
-            post.update(
-                {
-                    "image": f"http://localhost:8000/api/v1/posts/{verified_user.email}/{post["title"]}/image"
-                }
-            )
-        return verified_user.model_dump(exclude={"password", "permissions"})
-    except Exception as e:    
-        return user.model_dump(exclude={"password", "permissions"})
+    return ModelJSONResponse(
+        content=user, exclude={*USER_PRIVATE_FIELDS, "permissions"}, by_alias=False
+    )
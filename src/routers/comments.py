@@ -0,0 +1,41 @@
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query, status
+
+from beanie import PydanticObjectId
+
+from src.models import Comment, CommentEntry, User
+from src.utils.responses import ModelJSONResponse
+from src.utils.security import get_current_active_user
+from src.helpers.comments import add_comment, get_comment_page
+
+router = APIRouter(tags=["Comments"], prefix="/api/v1")
+
+ParentType = Literal["posts", "polls", "announcements"]
+
+
+@router.get("/{parent_type}/{parent_id}/comments")
+async def get_comments(
+    parent_type: ParentType,
+    parent_id: PydanticObjectId,
+    before: Annotated[int | None, Query(ge=0)] = None,
+):
+    page = await get_comment_page(parent_type, parent_id, before=before)
+    return ModelJSONResponse(status_code=status.HTTP_200_OK, content=page)
+
+
+@router.post("/{parent_type}/{parent_id}/comments")
+async def create_comment(
+    parent_type: ParentType,
+    parent_id: PydanticObjectId,
+    request: Comment,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    entry = CommentEntry(comment=request.comment, author=current_user.email)
+
+    if not await add_comment(parent_type, parent_id, entry):
+        return ModelJSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"message": "Item not found"},
+        )
+    return ModelJSONResponse(status_code=status.HTTP_201_CREATED, content=entry)
@@ -0,0 +1,67 @@
+import asyncio
+
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+
+from fastapi.responses import StreamingResponse
+
+from src.utils.broadcast import CHANNELS, get_broadcaster
+
+router = APIRouter(tags=["Events"], prefix="/api/v1")
+
+Channel = Literal["announcements", "polls"]
+
+KEEP_ALIVE_SECONDS = 15
+
+
+@router.get("/events")
+async def stream_events(channels: Annotated[list[Channel] | None, Query()] = None):
+    """Server-Sent Events stream of new announcements and poll results"""
+    broadcaster = get_broadcaster()
+    subscription = broadcaster.subscribe(tuple(channels or CHANNELS))
+
+    async def event_stream():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=KEEP_ALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # * Comment lines keep proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    # * Evicted for falling behind, the client will reconnect
+                    break
+                yield f"data: {message}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/events/ws")
+async def websocket_events(
+    websocket: WebSocket, channels: Annotated[list[Channel] | None, Query()] = None
+):
+    """WebSocket stream of new announcements and poll results"""
+    await websocket.accept()
+    broadcaster = get_broadcaster()
+    subscription = broadcaster.subscribe(tuple(channels or CHANNELS))
+
+    try:
+        async for message in subscription:
+            await websocket.send_text(message)
+        # * Evicted for falling behind, ask the client to reconnect later
+        await websocket.close(code=1013, reason="Subscriber too slow")
+    except (WebSocketDisconnect, RuntimeError):
+        # * Closed by the client, noticed on the next send
+        pass
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,87 @@
+from typing import Annotated, Literal
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    status,
+)
+
+from beanie import PydanticObjectId
+
+from pydantic import EmailStr
+
+from src.models import Post, PostImage, User
+from src.utils.responses import ModelJSONResponse
+from src.utils.security import get_current_active_user
+from src.helpers.images import (
+    IMAGE_TYPES,
+    create_thumbnail,
+    image_response,
+    store_post_image,
+)
+
+router = APIRouter(tags=["Posts"], prefix="/api/v1")
+
+
+# * The image is the raw request body, so it can be streamed through the size cap
+# * rather than spooled whole by a multipart parser first
+IMAGE_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            content_type: {"schema": {"type": "string", "format": "binary"}}
+            for content_type in IMAGE_TYPES
+        },
+    }
+}
+
+
+@router.put("/posts/{post_id}/image", openapi_extra=IMAGE_BODY)
+async def upload_post_image(
+    request: Request,
+    post_id: PydanticObjectId,
+    background_tasks: BackgroundTasks,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    post = await Post.get(post_id)
+
+    if not post:
+        return ModelJSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"message": "Post not found"},
+        )
+    if post.author != current_user.email:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the author can change the image of a post",
+        )
+
+    image = await store_post_image(post, request)
+    background_tasks.add_task(create_thumbnail, post.id, image)
+
+    return ModelJSONResponse(status_code=status.HTTP_201_CREATED, content=image)
+
+
+@router.get("/posts/{user_id}/{title}/image")
+async def get_post_image(
+    request: Request,
+    user_id: EmailStr,
+    title: str,
+    size: Literal["original", "thumbnail"] = "original",
+):
+    post = await Post.find_one(Post.author == user_id, Post.title == title)
+
+    if not post or not isinstance(post.image, PostImage):
+        return ModelJSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"message": "Image not found"},
+        )
+
+    # * Until the thumbnail is generated, fall back to the original
+    image = post.image
+    if size == "thumbnail" and image.thumbnail:
+        image = image.thumbnail
+    return await image_response(request, image)
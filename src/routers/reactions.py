@@ -0,0 +1,50 @@
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, status
+
+from beanie import PydanticObjectId
+
+from src.models import User
+from src.utils.responses import ModelJSONResponse
+from src.utils.security import get_current_active_user
+from src.helpers.reactions import get_reactions, react
+
+router = APIRouter(tags=["Reactions"], prefix="/api/v1")
+
+ItemType = Literal["posts", "announcements"]
+
+
+def reaction_response(counts) -> ModelJSONResponse:
+    if counts is None:
+        return ModelJSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"message": "Item not found"},
+        )
+    return ModelJSONResponse(status_code=status.HTTP_200_OK, content=counts)
+
+
+@router.get("/{item_type}/{item_id}/reactions")
+async def get_item_reactions(item_type: ItemType, item_id: PydanticObjectId):
+    return reaction_response(await get_reactions(item_type, item_id))
+
+
+@router.post("/{item_type}/{item_id}/likes")
+async def like_item(
+    item_type: ItemType,
+    item_id: PydanticObjectId,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    return reaction_response(
+        await react(item_type, item_id, "likes", current_user.email)
+    )
+
+
+@router.post("/{item_type}/{item_id}/dislikes")
+async def dislike_item(
+    item_type: ItemType,
+    item_id: PydanticObjectId,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    return reaction_response(
+        await react(item_type, item_id, "dislikes", current_user.email)
+    )
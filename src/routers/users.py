@@ -1,20 +1,37 @@
+import asyncio
+
 from pprint import pprint
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from typing import Annotated
 
-from beanie.operators import Set, Push
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
 
-from fastapi.responses import JSONResponse
+from beanie import PydanticObjectId
 
-from src.models import User, CreateUserRequest, VerifiedUser
+from beanie.operators import Set, Push
+
+from src.models import (
+    User,
+    USER_PRIVATE_FIELDS,
+    CreateUserRequest,
+    VerifiedUser,
+    Post,
+    PostSummary,
+    Poll,
+    Announcements,
+)
+from src.utils.responses import ModelJSONResponse
 from src.utils.security import get_password_hash
+from src.utils.rate_limit import create_user_rate_limit
 from src.helpers.background_tasks import add_permissions_and_fields_to_verified_user
+from src.helpers.pagination import keyset_page
+from src.helpers.reactions import add_pending
 
 from pydantic import EmailStr
 
 router = APIRouter(tags=["Users"], prefix="/api/v1")
 
 
-@router.post("/users")
+@router.post("/users", dependencies=[Depends(create_user_rate_limit)])
 async def create_user(request: CreateUserRequest):
 
     user = request.model_dump(by_alias=True, exclude={"verify_password"})
@@ -22,8 +39,10 @@ async def create_user(request: CreateUserRequest):
         {"permissions": ["me"], "password": get_password_hash(user.get("password"))}
     )
     new_user: User = await User.insert(User(**user))
-    return JSONResponse(
-        status_code=status.HTTP_201_CREATED, content=new_user.model_dump(by_alias=True)
+    return ModelJSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content=new_user,
+        exclude=USER_PRIVATE_FIELDS,
     )
 
 
@@ -31,21 +50,51 @@ async def create_user(request: CreateUserRequest):
 async def get_user(user_id: EmailStr):
     user = await User.find_one(User.email == user_id, with_children=True)
 
-    try:
-        verified_user = VerifiedUser(**user.model_dump())
-        for post in verified_user.posts:
-            post.update(
-                {
-                    "image": f"http://localhost:8000/api/v1/posts/{user_id}/{post[title]}/image"
-                }
-            )
-        return JSONResponse(
-            status_code=status.HTTP_200_OK, content=user.model_dump(by_alias=True)
-        )
-    except Exception as e:
-        return JSONResponse(
-            status_code=status.HTTP_200_OK, content=user.model_dump(by_alias=True)
+    if not user:
+        return ModelJSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"message": "User not found"},
         )
+    return ModelJSONResponse(
+        status_code=status.HTTP_200_OK, content=user, exclude=USER_PRIVATE_FIELDS
+    )
+
+
+@router.get("/users/{user_id}/posts")
+async def get_user_posts(
+    user_id: EmailStr,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    after: PydanticObjectId | None = None,
+):
+    page = await keyset_page(Post, Post.author == user_id, limit=limit, after=after)
+    # * Include clicks still waiting in the reaction buffer
+    await asyncio.gather(
+        *(add_pending("posts", post.id, post) for post in page["items"])
+    )
+    page["items"] = [PostSummary.model_validate(post) for post in page["items"]]
+    return ModelJSONResponse(status_code=status.HTTP_200_OK, content=page)
+
+
+@router.get("/users/{user_id}/polls")
+async def get_user_polls(
+    user_id: EmailStr,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    after: PydanticObjectId | None = None,
+):
+    page = await keyset_page(Poll, Poll.author == user_id, limit=limit, after=after)
+    return ModelJSONResponse(status_code=status.HTTP_200_OK, content=page)
+
+
+@router.get("/users/{user_id}/announcements")
+async def get_user_announcements(
+    user_id: EmailStr,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    after: PydanticObjectId | None = None,
+):
+    page = await keyset_page(
+        Announcements, Announcements.author == user_id, limit=limit, after=after
+    )
+    return ModelJSONResponse(status_code=status.HTTP_200_OK, content=page)
 
 
 @router.post("/users/verify/{user_id}")
@@ -53,7 +102,7 @@ async def verify_user(user_id: EmailStr, background_tasks: BackgroundTasks):
     user = await User.find_one(User.email == user_id)
 
     if not user:
-        return JSONResponse(
+        return ModelJSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
             content={"message": "User not found"},
         )
@@ -61,10 +110,11 @@ async def verify_user(user_id: EmailStr, background_tasks: BackgroundTasks):
     save_response: User = await user.save()
     background_tasks.add_task(add_permissions_and_fields_to_verified_user, user_id)
 
-    return JSONResponse(
+    return ModelJSONResponse(
         status_code=status.HTTP_200_OK,
         content={
             "message": "Account verified",
-            "detail": save_response.model_dump(by_alias=True),
+            "detail": save_response,
         },
+        exclude={"detail": USER_PRIVATE_FIELDS},
     )
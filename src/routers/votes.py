@@ -0,0 +1,30 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+
+from beanie import PydanticObjectId
+
+from src.models import CastVote, User
+from src.utils.responses import ModelJSONResponse
+from src.utils.security import get_current_active_user
+from src.helpers.polls import cast_vote, get_results
+
+router = APIRouter(tags=["Polls"], prefix="/api/v1")
+
+
+@router.post("/polls/{poll_id}/votes")
+async def vote_on_poll(
+    poll_id: PydanticObjectId,
+    request: CastVote,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    await cast_vote(poll_id, request.option, current_user.email)
+    return ModelJSONResponse(
+        status_code=status.HTTP_201_CREATED, content={"message": "Vote recorded"}
+    )
+
+
+@router.get("/polls/{poll_id}/results")
+async def get_poll_results(poll_id: PydanticObjectId):
+    results = await get_results(poll_id)
+    return ModelJSONResponse(status_code=status.HTTP_200_OK, content=results)
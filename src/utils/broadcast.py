@@ -0,0 +1,168 @@
+"""Fan-out of live events to connected clients.
+
+Each subscriber gets a bounded queue (`SUBSCRIBER_QUEUE_SIZE`, default 100). A
+subscriber that falls that far behind is evicted rather than slowing down
+publishing or growing memory; its stream ends and the client reconnects.
+
+With `BROADCAST_BACKEND=redis` (and `REDIS_URL`), events are published through
+Redis pub/sub so subscribers on every worker receive them.
+"""
+
+import asyncio
+import json
+import os
+
+from functools import cache
+
+from redis import asyncio as aioredis
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHANNELS = ("announcements", "polls")
+
+# * Seconds between attempts to resubscribe after losing Redis, doubling up to
+# * the maximum
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 30
+
+
+class Subscription:
+    """Events for one client, iterate over it to receive them"""
+
+    def __init__(self, channels: tuple[str, ...], queue_size: int):
+        self.channels = channels
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(queue_size)
+        self.evicted = False
+
+    def evict(self):
+        """Drops pending events and ends the subscription"""
+        self.evicted = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        message = await self.queue.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+class Broadcaster:
+    """Delivers events to subscribers of this process"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[Subscription]] = {
+            channel: set() for channel in CHANNELS
+        }
+
+    def subscribe(self, channels: tuple[str, ...] = CHANNELS) -> Subscription:
+        subscription = Subscription(channels, self.queue_size)
+        for channel in channels:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for channel in subscription.channels:
+            self._subscribers[channel].discard(subscription)
+
+    @staticmethod
+    def encode(event: str, data: dict) -> str:
+        return json.dumps({"event": event, "data": data})
+
+    async def publish(self, channel: str, event: str, data: dict):
+        self._deliver(channel, self.encode(event, data))
+
+    def _deliver(self, channel: str, message: str):
+        # * Encoded once, the same string is queued for every subscriber
+        for subscription in list(self._subscribers[channel]):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.unsubscribe(subscription)
+                subscription.evict()
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        for subscribers in self._subscribers.values():
+            for subscription in list(subscribers):
+                self.unsubscribe(subscription)
+                subscription.evict()
+
+
+class RedisBroadcaster(Broadcaster):
+    """Publishes through Redis, and delivers whatever Redis relays locally"""
+
+    def __init__(self, url: str, queue_size: int = 100, prefix: str = "events:"):
+        super().__init__(queue_size)
+        self.client = aioredis.from_url(url)
+        self.prefix = prefix
+        self._listener: asyncio.Task | None = None
+        self._subscribed = False
+
+    async def publish(self, channel: str, event: str, data: dict):
+        await self.client.publish(self.prefix + channel, self.encode(event, data))
+
+    async def _listen(self):
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(*(self.prefix + channel for channel in CHANNELS))
+        self._subscribed = True
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                channel = message["channel"].decode().removeprefix(self.prefix)
+                self._deliver(channel, message["data"].decode())
+        finally:
+            await pubsub.aclose()
+
+    async def _run(self):
+        """Keeps listening, resubscribing with backoff whenever Redis drops"""
+        delay = RECONNECT_DELAY
+        while True:
+            self._subscribed = False
+            try:
+                await self._listen()
+                error = "subscription ended"
+            except Exception as e:
+                error = e
+            if self._subscribed:
+                # * It was connected, so back off afresh
+                delay = RECONNECT_DELAY
+
+            # * Events published while disconnected are not replayed
+            print(f"Lost Redis event subscription ({error}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await super().stop()
+
+
+@cache
+def get_broadcaster() -> Broadcaster:
+    queue_size = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", "100"))
+    if os.getenv("BROADCAST_BACKEND", "memory") == "redis":
+        return RedisBroadcaster(
+            os.getenv("REDIS_URL", "redis://localhost:6379"), queue_size=queue_size
+        )
+    return Broadcaster(queue_size=queue_size)
@@ -0,0 +1,152 @@
+"""Compression of large JSON and text responses.
+
+`COMPRESSION_ENCODINGS` lists the encodings offered, in order of preference
+(default `br,gzip`). Only complete bodies of at least `COMPRESSION_MINIMUM_SIZE`
+bytes (default 1024) are compressed; smaller ones would barely shrink and
+streamed responses such as images and live events pass through untouched.
+`COMPRESSION_GZIP_LEVEL` (default 6) and `COMPRESSION_BROTLI_QUALITY` (default
+4) trade CPU for size.
+"""
+
+import gzip
+import os
+
+import brotli
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+# * Above this, compressing would block the event loop for too long
+THREADPOOL_THRESHOLD = 256 * 1024
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def select_encoding(accept_encoding: str, encodings: tuple[str, ...]) -> str | None:
+    """Picks the first of `encodings` the client accepts.
+
+    Codings refused with `q=0` stay refused even when `*` is accepted.
+    """
+    accepted, refused = set(), set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        name, _, quality = params.partition("=")
+        try:
+            refuse = name.strip() == "q" and float(quality) == 0
+        except ValueError:
+            continue
+        (refused if refuse else accepted).add(coding)
+
+    for encoding in encodings:
+        if encoding in refused:
+            continue
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: tuple[str, ...] | None = None,
+        minimum_size: int | None = None,
+        gzip_level: int | None = None,
+        brotli_quality: int | None = None,
+    ):
+        if encodings is None:
+            configured = os.getenv("COMPRESSION_ENCODINGS", "br,gzip").split(",")
+            encodings = tuple(
+                encoding.strip()
+                for encoding in configured
+                if encoding.strip() in ("br", "gzip")
+            )
+        if minimum_size is None:
+            minimum_size = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+        if gzip_level is None:
+            gzip_level = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+        if brotli_quality is None:
+            brotli_quality = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+        self.app = app
+        self.encodings = encodings
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith("text/event-stream")
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # * Hold the headers back until we know what the body is
+                    start = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # * Streamed or small bodies are sent as they are
+                passthrough = True
+                headers = MutableHeaders(raw=start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                await send(start)
+                await send(message)
+                return
+
+            level = self.levels[encoding]
+            if len(body) > THREADPOOL_THRESHOLD:
+                body = await run_in_threadpool(compress, body, encoding, level)
+            else:
+                body = compress(body, encoding, level)
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,256 @@
+"""Write-coalescing for hot `$inc` counters.
+
+Instead of one update per click or vote, increments are summed and written as
+one `bulk_write` of `$inc` updates every `flush_interval` seconds. Increments
+are buffered in process memory, or in Redis with `COUNTER_BACKEND=redis` (and
+`REDIS_URL`) so every worker sees them. Readers add `pending` to the stored
+count to see increments that have not been flushed yet.
+"""
+
+import asyncio
+import os
+
+from collections import Counter, defaultdict
+
+from beanie import Document
+from bson import json_util
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from redis import asyncio as aioredis
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class CounterBuffer:
+    """Sums `$inc` updates per document in memory and flushes them in batches"""
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._pending: defaultdict[tuple, Counter] = defaultdict(Counter)
+        # * Batches being written, still counted by `pending` until they land
+        self._flushing: list[dict[tuple, Counter]] = []
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval > 0
+
+    @staticmethod
+    def _key(model: type[Document], filter: dict) -> tuple:
+        # * Encoded, filters may hold operators such as `{"$ne": True}`
+        return (model, json_util.dumps(sorted(filter.items())))
+
+    async def increment(
+        self, model: type[Document], filter: dict, field: str, amount: int = 1
+    ):
+        """Queues `{"$inc": {field: amount}}` for the documents matching `filter`"""
+        self._pending[self._key(model, filter)][field] += amount
+
+    async def pending(self, model: type[Document], filter: dict, field: str) -> int:
+        """Returns the increments queued for `field` that are not written yet"""
+        key = self._key(model, filter)
+        return sum(
+            batch[key][field]
+            for batch in (self._pending, *self._flushing)
+            if key in batch
+        )
+
+    async def _write(self, pending: dict[tuple, Counter]) -> dict[tuple, Counter]:
+        """Writes `pending` as one bulk write per model, returns what failed"""
+        updates: defaultdict[type[Document], list] = defaultdict(list)
+        for key, fields in pending.items():
+            updates[key[0]].append((key, fields))
+
+        failed = {}
+        for model, entries in updates.items():
+            operations = [
+                UpdateOne(dict(json_util.loads(filter)), {"$inc": dict(fields)})
+                for (_, filter), fields in entries
+            ]
+            try:
+                await model.get_motor_collection().bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # * Part of the batch was applied, retrying could count twice
+                print(e.details)
+            except PyMongoError as e:
+                print(e)
+                failed.update(entries)
+        return failed
+
+    async def flush(self):
+        # * Swap the buffer first, increments made while writing go to the next flush
+        pending, self._pending = self._pending, defaultdict(Counter)
+        if not pending:
+            return
+
+        self._flushing.append(pending)
+        failed = pending
+        try:
+            failed = await self._write(pending)
+        finally:
+            self._flushing.remove(pending)
+            # * Also restores the whole batch if the write raised
+            for key, fields in failed.items():
+                self._pending[key].update(fields)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                # * Keep flushing, the next interval retries
+                print(e)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the flush loop and writes whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# * Takes the flush lease (ARGV[1] token, ARGV[2] milliseconds) and moves the
+# * buffer into the in-flight hash, where readers still count it. Whatever is
+# * in flight already was left by a flush that died before settling, the lease
+# * makes it ours to write again
+CLAIM_SCRIPT = """
+if not redis.call('SET', KEYS[3], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return {}
+end
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+    redis.call('HINCRBY', KEYS[2], entries[i], entries[i + 1])
+end
+redis.call('DEL', KEYS[1])
+local claimed = redis.call('HGETALL', KEYS[2])
+if #claimed == 0 then
+    redis.call('DEL', KEYS[3])
+end
+return claimed
+"""
+
+# * Takes written increments off the in-flight hash, puts failed ones back and
+# * releases the lease. ARGV holds the lease token, then (field, amount,
+# * failed) triples
+SETTLE_SCRIPT = """
+for i = 2, #ARGV, 3 do
+    local field, amount = ARGV[i], tonumber(ARGV[i + 1])
+    if redis.call('HINCRBY', KEYS[2], field, -amount) <= 0 then
+        redis.call('HDEL', KEYS[2], field)
+    end
+    if ARGV[i + 2] == '1' then
+        redis.call('HINCRBY', KEYS[1], field, amount)
+    end
+end
+if redis.call('GET', KEYS[3]) == ARGV[1] then
+    redis.call('DEL', KEYS[3])
+end
+"""
+
+
+class RedisCounterBuffer(CounterBuffer):
+    """Keeps the buffer in a Redis hash shared by every worker.
+
+    Any worker's flush drains increments made by all of them, and `pending`
+    gives read-your-writes no matter which worker serves the read. Increments
+    being flushed sit in a second hash until the write lands. One worker
+    flushes at a time, holding a lease of `lease` seconds; if it dies before
+    settling, the first flush after the lease expires, from any worker or a
+    restarted one, writes the stranded increments.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float,
+        models: list[type[Document]],
+        url: str,
+        name: str = "counters",
+        lease: float = 60,
+    ):
+        super().__init__(flush_interval)
+        self.models = {model.get_collection_name(): model for model in models}
+        self.client = aioredis.from_url(url)
+        self.hash_key = f"{name}:pending"
+        self.flushing_key = f"{name}:flushing"
+        self.lease_key = f"{name}:lease"
+        self.lease = lease
+        self._claim = self.client.register_script(CLAIM_SCRIPT)
+        self._settle = self.client.register_script(SETTLE_SCRIPT)
+
+    @staticmethod
+    def _field(model: type[Document], filter: dict, field: str) -> str:
+        return json_util.dumps(
+            [model.get_collection_name(), sorted(filter.items()), field]
+        )
+
+    async def increment(
+        self, model: type[Document], filter: dict, field: str, amount: int = 1
+    ):
+        await self.client.hincrby(
+            self.hash_key, self._field(model, filter, field), amount
+        )
+
+    async def pending(self, model: type[Document], filter: dict, field: str) -> int:
+        entry = self._field(model, filter, field)
+        async with self.client.pipeline(transaction=True) as pipeline:
+            pipeline.hget(self.hash_key, entry)
+            pipeline.hget(self.flushing_key, entry)
+            queued, flushing = await pipeline.execute()
+        return int(queued or 0) + int(flushing or 0)
+
+    async def flush(self):
+        # * Claimed atomically, so no increment is missed or written twice
+        keys = [self.hash_key, self.flushing_key, self.lease_key]
+        token = os.urandom(16).hex()
+        claimed = await self._claim(keys=keys, args=[token, int(self.lease * 1000)])
+        if not claimed:
+            return
+
+        entries = []
+        pending: defaultdict[tuple, Counter] = defaultdict(Counter)
+        for entry, amount in zip(claimed[::2], claimed[1::2]):
+            try:
+                collection, filter, field = json_util.loads(entry)
+                key = self._key(self.models[collection], dict(filter))
+            except (ValueError, TypeError, KeyError) as e:
+                # * Left queued rather than dropped
+                print(e)
+                key = None
+            else:
+                pending[key][field] += int(amount)
+            entries.append((entry, int(amount), key))
+
+        failed = pending
+        try:
+            failed = await self._write(pending)
+        finally:
+            # * Settled even if the write raised, so nothing stays stranded
+            args = [token]
+            for entry, amount, key in entries:
+                args.extend([entry, amount, 1 if key is None or key in failed else 0])
+            await self._settle(keys=keys, args=args)
+
+
+def make_counter_buffer(
+    flush_interval: float, models: list[type[Document]], name: str
+) -> CounterBuffer:
+    """Returns the buffer selected by `COUNTER_BACKEND` (memory or redis)"""
+    if os.getenv("COUNTER_BACKEND", "memory") == "redis":
+        return RedisCounterBuffer(
+            flush_interval,
+            models,
+            os.getenv("REDIS_URL", "redis://localhost:6379"),
+            name=name,
+        )
+    return CounterBuffer(flush_interval)
@@ -0,0 +1,195 @@
+"""Token-bucket rate limiting for the expensive routes.
+
+Budgets are written as "<requests>/<seconds>", e.g. "10/60" allows bursts of
+10 requests refilled evenly over a minute. Each route has a per-client budget,
+keyed by token subject or client IP, and a global budget shared by everyone.
+They can be overridden per route through the environment, e.g.
+`RATE_LIMIT_LOGIN=10/60` and `RATE_LIMIT_LOGIN_GLOBAL=20/1`.
+
+`RATE_LIMIT_BACKEND=redis` (with `REDIS_URL`) keeps buckets in Redis so limits
+hold across workers; the default `memory` backend is per process.
+"""
+
+import math
+import os
+import time
+
+from collections import OrderedDict
+from functools import cache
+from typing import NamedTuple
+
+import jwt
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from fastapi import HTTPException, status
+from starlette.requests import HTTPConnection
+
+from dotenv import load_dotenv
+
+from src.utils.tokens import get_token_verifier
+
+load_dotenv()
+
+
+class RateLimit(NamedTuple):
+    capacity: float
+    rate: float  # * Tokens added back per second
+
+    @classmethod
+    def parse(cls, budget: str) -> "RateLimit":
+        requests, seconds = (float(part) for part in budget.split("/"))
+        if requests <= 0 or seconds <= 0:
+            raise ValueError(f"Rate limit budget must be positive: {budget!r}")
+        return cls(requests, requests / seconds)
+
+
+DEFAULT_BUDGETS = {
+    # * bcrypt verification
+    "login": ("10/60", "20/1"),
+    # * bcrypt hashing and an insert
+    "create_user": ("5/60", "20/1"),
+    # * LLM generation, limited per WebSocket message
+    "bot_chat": ("20/60", "5/1"),
+}
+
+
+class InMemoryBackend:
+    """Per-process buckets, the least recently used are dropped past `max_keys`"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def acquire(self, key: str, limit: RateLimit, cost: float = 1) -> float:
+        """Takes `cost` tokens, returns 0 if allowed or seconds until it would be.
+
+        A negative `cost` gives tokens back, up to the bucket's capacity.
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens = min(limit.capacity, tokens - cost)
+        else:
+            retry_after = (cost - tokens) / limit.rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+# * Refill, take and store in one round trip so concurrent workers cannot race
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= cost then
+    tokens = math.min(capacity, tokens - cost)
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisBackend:
+    """Buckets shared by every worker through Redis"""
+
+    def __init__(self, url: str, prefix: str = "rate-limit:"):
+        self.prefix = prefix
+        self.client = aioredis.from_url(url)
+        self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, limit: RateLimit, cost: float = 1) -> float:
+        try:
+            retry_after = await self._script(
+                keys=[self.prefix + key], args=[limit.capacity, limit.rate, cost]
+            )
+        except RedisError as e:
+            # * Fail open, an unreachable Redis should not take login down with it
+            print(e)
+            return 0.0
+        return float(retry_after)
+
+
+@cache
+def get_rate_limit_backend() -> InMemoryBackend | RedisBackend:
+    if os.getenv("RATE_LIMIT_BACKEND", "memory") == "redis":
+        return RedisBackend(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    return InMemoryBackend()
+
+
+def client_key(connection: HTTPConnection) -> str:
+    """Identifies the caller by token subject, falling back to client IP"""
+    token = connection.query_params.get("token")
+    authorization = connection.headers.get("Authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+
+    if token:
+        try:
+            subject = get_token_verifier().verify(token).get("sub")
+        except jwt.InvalidTokenError:
+            subject = None
+        if subject:
+            return f"user:{subject}"
+
+    host = connection.client.host if connection.client else "unknown"
+    return f"ip:{host}"
+
+
+class RateLimiter:
+    """Per-client and global token buckets for one route.
+
+    Use as a dependency on HTTP routes, or call `check` for each message on a
+    WebSocket.
+    """
+
+    def __init__(self, name: str):
+        per_client, global_ = DEFAULT_BUDGETS[name]
+        env_name = f"RATE_LIMIT_{name.upper()}"
+        self.name = name
+        self.per_client = RateLimit.parse(os.getenv(env_name, per_client))
+        self.global_ = RateLimit.parse(os.getenv(f"{env_name}_GLOBAL", global_))
+
+    async def check(self, connection: HTTPConnection) -> float:
+        """Returns 0 if the call is allowed, otherwise seconds to wait"""
+        backend = get_rate_limit_backend()
+        key = f"{self.name}:{client_key(connection)}"
+        retry_after = await backend.acquire(key, self.per_client)
+        if retry_after:
+            return retry_after
+
+        retry_after = await backend.acquire(f"{self.name}:global", self.global_)
+        if retry_after:
+            # * The call is not made, so it should not count against the client
+            await backend.acquire(key, self.per_client, cost=-1)
+        return retry_after
+
+    async def __call__(self, connection: HTTPConnection):
+        retry_after = await self.check(connection)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+login_rate_limit = RateLimiter("login")
+create_user_rate_limit = RateLimiter("create_user")
+bot_chat_rate_limit = RateLimiter("bot_chat")
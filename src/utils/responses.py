@@ -0,0 +1,36 @@
+"""JSON responses serialized straight from Pydantic models to bytes"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class ModelJSONResponse(JSONResponse):
+    """A `JSONResponse` that accepts Pydantic models as content.
+
+    Models, and dicts or lists containing them, are serialized by
+    pydantic-core in one pass, skipping the intermediate Python dict and the
+    stdlib `json` encoder. Values pydantic cannot serialize, such as raw
+    `ObjectId`s, fall back to `str`. `exclude` takes field names, or a dict
+    mapping keys to what to leave out of the value under them.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        *,
+        by_alias: bool = True,
+        exclude: set[str] | dict | None = None,
+        **kwargs,
+    ):
+        self.by_alias = by_alias
+        self.exclude = exclude
+        super().__init__(content, status_code, headers, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return to_json(
+            content, by_alias=self.by_alias, exclude=self.exclude, fallback=str
+        )
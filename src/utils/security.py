@@ -1,5 +1,3 @@
-import os
-
 from datetime import datetime, timedelta, timezone
 from pprint import pprint
 from typing import Annotated
@@ -10,14 +8,12 @@ from fastapi.security import (
     OAuth2PasswordRequestForm,
     SecurityScopes,
 )
-from jose import JWTError, jwt
-from jwt import InvalidTokenError
+from jwt import ExpiredSignatureError, InvalidTokenError
 from passlib.context import CryptContext
 
 from src.models import TokenData, Token
 from src.models import User
-
-from jose.exceptions import ExpiredSignatureError
+from src.utils.tokens import get_token_verifier
 
 
 from pydantic import ValidationError, EmailStr
@@ -73,51 +69,52 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, os.getenv("SECRET_KEY"), algorithm=os.getenv("ALGORITHM")
-    )
+    encoded_jwt = get_token_verifier().encode(to_encode)
 
     return encoded_jwt
 
 
-async def get_current_user(
-    security_scopes: SecurityScopes, token: Annotated[str, Depends(oauth2_scheme)]
-):
-
+def credentials_exception(security_scopes: SecurityScopes) -> HTTPException:
     if security_scopes.scopes:
         authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
     else:
         authenticate_value = "Bearer"
 
-    credentials_exception = HTTPException(
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": authenticate_value},
     )
+
+
+async def get_current_user(
+    security_scopes: SecurityScopes, token: Annotated[str, Depends(oauth2_scheme)]
+):
+    # * Exceptions are only built on failure, the happy path is a cache lookup
     try:
-        payload = jwt.decode(
-            token, os.getenv("SECRET_KEY"), algorithms=os.getenv("ALGORITHM")
-        )
+        payload = get_token_verifier().verify(token)
         username: str | None = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise credentials_exception(security_scopes)
         token_scopes = payload.get("scopes")
         token_data = TokenData(scopes=token_scopes, username=username)
-    except (InvalidTokenError, ValidationError):
-        raise credentials_exception
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Your token has expired"
         )
+    except (InvalidTokenError, ValidationError):
+        raise credentials_exception(security_scopes)
     user = await get_user(username=token_data.username)
     if user is None:
-        raise credentials_exception
+        raise credentials_exception(security_scopes)
     for scope in security_scopes.scopes:
         if scope not in token_data.scopes:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Not enough permissions",
-                headers={"WWW-Authenticate": authenticate_value},
+                headers={
+                    "WWW-Authenticate": f'Bearer scope="{security_scopes.scope_str}"'
+                },
             )
     return user
 
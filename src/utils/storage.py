@@ -0,0 +1,188 @@
+"""Blob storage for uploaded images.
+
+`STORAGE_BACKEND` selects where bytes live:
+
+- `filesystem` (default): files under `STORAGE_ROOT` (default `./storage`)
+- `s3`: the `S3_BUCKET` bucket. `S3_ENDPOINT_URL` points it at any
+  S3-compatible server, e.g. a local MinIO for development and tests
+
+Both backends read and write in chunks, so a blob is never held in memory whole.
+"""
+
+import asyncio
+import hashlib
+import os
+import uuid
+
+from functools import cache
+from pathlib import Path
+from typing import AsyncIterator, NamedTuple
+
+import boto3
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHUNK_SIZE = 64 * 1024
+
+# * S3 needs at least 5 MB per part, except for the last one
+S3_PART_SIZE = 8 * 1024 * 1024
+
+
+class StoredBlob(NamedTuple):
+    size: int
+    etag: str  # * SHA-256 of the content, the same whichever backend stores it
+
+
+class FileSystemStorage:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes], content_type: str):
+        path = self._path(key)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+
+        # * Write next to the target and rename, readers never see half a file
+        temporary = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        digest = hashlib.sha256()
+        size = 0
+        blob = await asyncio.to_thread(open, temporary, "wb")
+        try:
+            async for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                await asyncio.to_thread(blob.write, chunk)
+            blob.close()
+            await asyncio.to_thread(os.replace, temporary, path)
+        except BaseException:
+            blob.close()
+            temporary.unlink(missing_ok=True)
+            raise
+        return StoredBlob(size=size, etag=digest.hexdigest())
+
+    async def open(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """Yields the bytes from `start` to `end` (inclusive) in chunks"""
+        blob = await asyncio.to_thread(open, self._path(key), "rb")
+        try:
+            await asyncio.to_thread(blob.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+                chunk = await asyncio.to_thread(blob.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            blob.close()
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+
+class S3Storage:
+    def __init__(self, bucket: str, endpoint_url: str | None = None):
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes], content_type: str):
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        upload_id = None
+        parts = []
+
+        try:
+            async for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                buffer += chunk
+                if len(buffer) < S3_PART_SIZE:
+                    continue
+
+                # * Only switch to a multipart upload once the blob outgrows one part
+                if upload_id is None:
+                    upload = await asyncio.to_thread(
+                        self.client.create_multipart_upload,
+                        Bucket=self.bucket,
+                        Key=key,
+                        ContentType=content_type,
+                    )
+                    upload_id = upload["UploadId"]
+                parts.append(await self._upload_part(key, upload_id, parts, buffer))
+                buffer = bytearray()
+
+            if upload_id is None:
+                await asyncio.to_thread(
+                    self.client.put_object,
+                    Bucket=self.bucket,
+                    Key=key,
+                    Body=bytes(buffer),
+                    ContentType=content_type,
+                )
+            else:
+                if buffer:
+                    parts.append(await self._upload_part(key, upload_id, parts, buffer))
+                await asyncio.to_thread(
+                    self.client.complete_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+        except BaseException:
+            if upload_id is not None:
+                await asyncio.to_thread(
+                    self.client.abort_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                )
+            raise
+        return StoredBlob(size=size, etag=digest.hexdigest())
+
+    async def _upload_part(
+        self, key: str, upload_id: str, parts: list, data: bytearray
+    ) -> dict:
+        part_number = len(parts) + 1
+        response = await asyncio.to_thread(
+            self.client.upload_part,
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=bytes(data),
+        )
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    async def open(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """Yields the bytes from `start` to `end` (inclusive) in chunks"""
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = await asyncio.to_thread(
+            self.client.get_object, Bucket=self.bucket, Key=key, Range=byte_range
+        )
+        body = response["Body"]
+        try:
+            while chunk := await asyncio.to_thread(body.read, CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+
+@cache
+def get_storage() -> FileSystemStorage | S3Storage:
+    if os.getenv("STORAGE_BACKEND", "filesystem") == "s3":
+        return S3Storage(os.getenv("S3_BUCKET"), os.getenv("S3_ENDPOINT_URL"))
+    return FileSystemStorage(os.getenv("STORAGE_ROOT", "./storage"))
@@ -0,0 +1,122 @@
+"""Signing and verification of access tokens.
+
+Key material is read from the environment once, on first use:
+
+- `ALGORITHM`: any algorithm supported by PyJWT, e.g. HS256, RS256 or EdDSA
+- `SECRET_KEY`: shared secret for the HMAC (HS*) algorithms
+- `PRIVATE_KEY_FILE` / `PUBLIC_KEY_FILE`: PEM files for the asymmetric algorithms.
+  Services that only verify tokens need nothing but `PUBLIC_KEY_FILE`.
+- `TOKEN_CACHE_SIZE`: number of verified tokens kept in memory (0 disables it)
+"""
+
+import copy
+import os
+import time
+
+from collections import OrderedDict
+from functools import cache
+
+import jwt
+
+from jwt.algorithms import get_default_algorithms
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TokenVerifier:
+    """Encodes and verifies JWTs with key material loaded up front.
+
+    Verified claims are cached by token until the token's `exp`, so repeated
+    requests with the same bearer token skip signature checks entirely.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key=None,
+        verification_key=None,
+        cache_size: int = 10_000,
+    ):
+        algorithms = get_default_algorithms()
+        if algorithm not in algorithms:
+            raise ValueError(f"Unsupported token algorithm: {algorithm}")
+
+        # * Parse PEM/secret strings once instead of on every encode/decode
+        implementation = algorithms[algorithm]
+        self.algorithm = algorithm
+        self.signing_key = (
+            implementation.prepare_key(signing_key) if signing_key is not None else None
+        )
+        if verification_key is not None:
+            self.verification_key = implementation.prepare_key(verification_key)
+        elif hasattr(self.signing_key, "public_key"):
+            self.verification_key = self.signing_key.public_key()
+        else:
+            self.verification_key = self.signing_key
+        if self.verification_key is None:
+            raise ValueError("No key material configured for token verification")
+
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "TokenVerifier":
+        algorithm = os.getenv("ALGORITHM", "HS256")
+        cache_size = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+        if algorithm.startswith("HS"):
+            secret = os.getenv("SECRET_KEY")
+            return cls(algorithm, secret, secret, cache_size=cache_size)
+
+        return cls(
+            algorithm,
+            _read_key_file(os.getenv("PRIVATE_KEY_FILE")),
+            _read_key_file(os.getenv("PUBLIC_KEY_FILE")),
+            cache_size=cache_size,
+        )
+
+    def encode(self, claims: dict) -> str:
+        if self.signing_key is None:
+            raise RuntimeError("This verifier has no signing key configured")
+        return jwt.encode(claims, self.signing_key, algorithm=self.algorithm)
+
+    def verify(self, token: str) -> dict:
+        """Returns the token's claims, raises `jwt.InvalidTokenError` if invalid.
+
+        Callers get their own copy, the cached claims are never handed out.
+        """
+        cached = self._cache.get(token)
+        if cached is not None:
+            expires_at, claims = cached
+            if expires_at > time.time():
+                self._cache.move_to_end(token)
+                return copy.deepcopy(claims)
+            del self._cache[token]
+
+        claims = jwt.decode(token, self.verification_key, algorithms=[self.algorithm])
+
+        # * Tokens without `exp` are never cached, they cannot be evicted safely
+        expires_at = claims.get("exp")
+        if self.cache_size > 0 and isinstance(expires_at, (int, float)):
+            self._cache[token] = (expires_at, copy.deepcopy(claims))
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return claims
+
+    def clear_cache(self):
+        self._cache.clear()
+
+
+def _read_key_file(path: str | None) -> str | None:
+    if not path:
+        return None
+    with open(path) as key_file:
+        return key_file.read()
+
+
+@cache
+def get_token_verifier() -> TokenVerifier:
+    """Returns the process-wide verifier, built from the environment on first call"""
+    return TokenVerifier.from_env()